@@ -0,0 +1,12 @@
+# analysis_spec.py
+
+# Single source of truth for the analysis tiers:
+# analysis_type -> (credits required, holders analyzed, display label)
+ANALYSIS_SPEC = {
+    'quick': (1, 10, 'Quick'),
+    'deep': (5, 50, 'Deep'),
+}
+
+def get_analysis_spec(analysis_type: str):
+    """Return (credits, holders, label) for a tier, defaulting to quick"""
+    return ANALYSIS_SPEC.get(analysis_type, ANALYSIS_SPEC['quick'])
@@ -1,16 +1,37 @@
 import os
 import asyncio
-from collections import deque
+import time
+from collections import deque, defaultdict
 from datetime import datetime
 import logging
 from typing import Optional, Dict
 import shutil
 from analyze import TokenAnalyzer
 from analyzeHoldersAndDeveloper import analyze_csvs
+from analysis_spec import get_analysis_spec
 from message_formatter import MessageFormatter
 from handlers.menu_handler import MenuHandler
 from wallet_analyzer import WalletConnectionAnalyzer
 
+class TokenBucket:
+    """Token bucket limiter; acquire() sleeps until a token is available"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
 class AnalyzerQueue:
     def __init__(self, db_manager):
         # Initialize logger first
@@ -38,6 +59,11 @@ class AnalyzerQueue:
         
         # Store application instance for sending messages
         self.app = None
+
+        # Proactive outbound rate limits: 30 msg/s global, 1 msg/s per chat,
+        # so we never trip Telegram's RetryAfter in the first place
+        self.global_bucket = TokenBucket(30, 30)
+        self.chat_buckets = defaultdict(lambda: TokenBucket(1, 1))
         
         # Analysis results storage
         self.analysis_results = {}
@@ -58,6 +84,8 @@ class AnalyzerQueue:
         """Helper method to send messages"""
         if self.app:
             try:
+                await self.global_bucket.acquire()
+                await self.chat_buckets[chat_id].acquire()
                 await self.app.bot.send_message(
                     chat_id=chat_id,
                     text=text,
@@ -130,24 +158,17 @@ class AnalyzerQueue:
                 return True
             
             # Different analysis type - proceed with new analysis
-            credits_required = 5 if analysis_type == "deep" else 1
-            user_data = self.db_manager.get_user(user_id)
-            
-            if not user_data or user_data['credits'] < credits_required:
+            credits_required, _, _ = get_analysis_spec(analysis_type)
+
+            # Atomically check and deduct credits in a single call
+            if not self.db_manager.try_reserve_credits(user_id, credits_required):
+                user_data = self.db_manager.get_user(user_id)
                 await self.send_message(
                     chat_id=chat_id,
                     text=f"❌ Insufficient credits. Need {credits_required} credits.\n"
                          f"Your balance: {user_data['credits'] if user_data else 0}"
                 )
                 return False
-            
-            # Deduct credits
-            if not self.db_manager.use_credit(user_id, credits_required):
-                await self.send_message(
-                    chat_id=chat_id,
-                    text=f"❌ Error deducting credits. Please try again."
-                )
-                return False
 
         # Check if queue is not empty (other analyses are pending)
         if len(self.queue) > 0:
@@ -170,26 +191,18 @@ class AnalyzerQueue:
             "timestamp": datetime.now().isoformat()
         }
         
-        # Deduct credits before starting new analysis
-        credits_required = 5 if analysis_type == "deep" else 1
-        user_data = self.db_manager.get_user(user_id)
-        
-        if not user_data or user_data['credits'] < credits_required:
+        # Deduct credits before starting new analysis (atomic check + deduct)
+        credits_required, _, _ = get_analysis_spec(analysis_type)
+
+        if not self.db_manager.try_reserve_credits(user_id, credits_required):
+            user_data = self.db_manager.get_user(user_id)
             await self.send_message(
                 chat_id=chat_id,
                 text=f"❌ Insufficient credits. Need {credits_required} credits.\n"
                      f"Your balance: {user_data['credits'] if user_data else 0}"
             )
             return False
-        
-        # Deduct credits
-        if not self.db_manager.use_credit(user_id, credits_required):
-            await self.send_message(
-                chat_id=chat_id,
-                text=f"❌ Error deducting credits. Please try again."
-            )
-            return False
-        
+
         self.queue.append(task)
         self.active_tokens[token_address] = {
             'users': {user_id},
@@ -270,9 +283,9 @@ class AnalyzerQueue:
                                 self.logger.error(f"Error sending connection report: {str(e)}")
 
             # Get remaining credits
-            user_data = self.db_manager.get_user(user_id)
+            user_data = self.db_manager.get_user_cached(user_id)
             remaining_credits = user_data['credits'] if user_data else 0
-            credits_used = 5 if analysis_type == "deep" else 1
+            credits_used, _, _ = get_analysis_spec(analysis_type)
             
             # Send completion message with appropriate menu
             menu_markup = self.menu_handler.get_analysis_menu(
@@ -329,7 +342,7 @@ class AnalyzerQueue:
 
                     try:
                         # Run analysis code...
-                        num_holders = 50 if analysis_type == "deep" else 10
+                        _, num_holders, _ = get_analysis_spec(analysis_type)
                         
                         # Send starting message
                         await self.send_message(
@@ -404,7 +417,7 @@ class AnalyzerQueue:
                         # Refund credits if analysis fails
                         if user_id in self.active_tokens[token_address]['credits_deducted']:
                             try:
-                                credits_required = 5 if analysis_type == "deep" else 1
+                                credits_required, _, _ = get_analysis_spec(analysis_type)
                                 await self.db_manager.add_credits(user_id, credits_required)
                                 self.logger.info(f"Refunded {credits_required} credits to user {user_id} due to analysis failure")
                                 
@@ -463,7 +476,7 @@ class AnalyzerQueue:
 
         
         try:
-            num_holders = 50 if analysis_type == "deep" else 10
+            _, num_holders, _ = get_analysis_spec(analysis_type)
             
             # Send starting message
             await self.send_message(
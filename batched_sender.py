@@ -0,0 +1,78 @@
+# batched_sender.py
+
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+class BatchedSender:
+    """Coalesce bursts of outbound messages to the same chat into one send.
+
+    Plain text messages queued within the flush window are joined with blank
+    lines (respecting parse_mode and the 4096-char Telegram cap) and sent as
+    a single message, so callback floods cost one HTTPS round trip instead
+    of one per message. Messages carrying extra kwargs (reply_markup etc.)
+    can't be merged and are sent straight through.
+    """
+
+    MAX_MESSAGE_LENGTH = 4096
+
+    def __init__(self, analyzer_queue, flush_interval: float = 0.1):
+        self.analyzer_queue = analyzer_queue
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger('TokenAnalyzer')
+        self._pending: Dict[int, List[Tuple[str, str]]] = {}
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+
+    async def enqueue(self, chat_id: int, text: str, parse_mode: str = None, **kwargs):
+        """Queue a message for batched delivery"""
+        if kwargs:
+            # Markup or other extras make the message unmergeable
+            await self.analyzer_queue.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode,
+                **kwargs
+            )
+            return
+
+        self._pending.setdefault(chat_id, []).append((text, parse_mode))
+        if chat_id not in self._flush_tasks:
+            self._flush_tasks[chat_id] = asyncio.create_task(self._flush_later(chat_id))
+
+    async def _flush_later(self, chat_id: int):
+        """Wait out the batching window, then drain the chat's queue"""
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            entries = self._pending.pop(chat_id, [])
+            self._flush_tasks.pop(chat_id, None)
+
+        for text, parse_mode in self._merge(entries):
+            try:
+                await self.analyzer_queue.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode=parse_mode
+                )
+            except Exception as e:
+                self.logger.error(f"Error sending batched message: {str(e)}")
+
+    def _merge(self, entries: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Join consecutive compatible entries up to the message length cap"""
+        batches = []
+        buf = None
+        buf_mode = None
+
+        for text, parse_mode in entries:
+            if (buf is not None and parse_mode == buf_mode
+                    and len(buf) + len(text) + 2 <= self.MAX_MESSAGE_LENGTH):
+                buf += "\n\n" + text
+            else:
+                if buf is not None:
+                    batches.append((buf, buf_mode))
+                buf = text
+                buf_mode = parse_mode
+
+        if buf is not None:
+            batches.append((buf, buf_mode))
+        return batches
@@ -5,6 +5,7 @@ import logging
 import asyncio
 from typing import Dict
 from queue_status import QueueStatus
+from session_manager import RateLimitAction
 
 class BotCommands:
     def __init__(self, db_manager, analyzer_queue, message_formatter, menu_handler, session_manager):
@@ -158,7 +159,7 @@ class BotCommands:
         try:
             # Rate limit check
             user_id = query.from_user.id
-            if not self.session_manager.check_rate_limit(user_id, 'payment_creation', 30):
+            if not self.session_manager.check_rate_limit(user_id, RateLimitAction.PAYMENT_CREATION, 30):
                 await query.answer("Please wait", show_alert=True)
                 return
 
@@ -1,12 +1,44 @@
 from datetime import datetime
 from typing import Optional, Dict
 from supabase import create_client, Client
+from postgrest import APIError
+import httpx
 import os
 from dotenv import load_dotenv
 import logging
-import asyncio  # Add this import statement
-import logging  # Add this import statement
-import sqlite3
+import asyncio
+import time
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter
+)
+
+try:
+    # Route the JSON encode/decode that postgrest does through httpx on every
+    # Supabase call to orjson (2-6x faster than stdlib json). Best effort: if
+    # orjson is missing or httpx internals move, stdlib json keeps working.
+    import orjson
+    import httpx._content
+    import httpx._models
+
+    class _OrjsonShim:
+        @staticmethod
+        def dumps(obj, **kwargs):
+            return orjson.dumps(obj).decode()
+
+        @staticmethod
+        def loads(data, **kwargs):
+            return orjson.loads(data)
+
+    # httpx._content binds `from json import dumps as json_dumps` (the name
+    # `json` there is a parameter), so the function alias is the symbol to
+    # replace; httpx._models goes through its `jsonlib` module alias
+    httpx._content.json_dumps = _OrjsonShim.dumps
+    httpx._models.jsonlib = _OrjsonShim()
+except Exception:  # pragma: no cover
+    pass
 
 
 class DatabaseManager:
@@ -22,10 +54,60 @@ class DatabaseManager:
             raise ValueError("Supabase credentials not found in environment variables")
             
         self.supabase: Client = create_client(supabase_url, supabase_key)
-        
+
+        # Pre-resolved table builders for the hot paths
+        self._users = self.supabase.table('users')
+        self._payments = self.supabase.table('payments')
+        self._history = self.supabase.table('analysis_history')
+        self._credit_logs = self.supabase.table('credit_logs')
+
+        # Timestamp cache for _now_iso (10ms resolution)
+        self._ts_last = 0.0
+        self._ts_cached = ''
+
+        # Short-TTL user row cache; one analysis flow reads the same row
+        # several times within seconds
+        self._user_cache: Dict[int, tuple] = {}
+        self._user_cache_ttl = 5.0
+
+    def _now_iso(self) -> str:
+        """ISO timestamp cached at 10ms resolution to skip redundant formatting"""
+        t = time.time()
+        if t - self._ts_last > 0.01:
+            self._ts_cached = datetime.fromtimestamp(t).isoformat()
+            self._ts_last = t
+        return self._ts_cached
+
+    def _retrying(self) -> AsyncRetrying:
+        """Shared retry policy for Supabase writes (jittered exponential backoff).
+
+        Only transport-level failures and PostgREST API errors are retried;
+        anything else (validation bugs, programming errors) is permanent
+        and re-raises immediately instead of burning three round trips.
+        """
+        return AsyncRetrying(
+            retry=retry_if_exception_type((httpx.TransportError, APIError)),
+            stop=stop_after_attempt(3),
+            wait=wait_exponential_jitter(initial=0.25, max=2),
+            reraise=True
+        )
+
+    def get_user_cached(self, user_id: int) -> Optional[Dict]:
+        """get_user behind a short TTL cache; credit changes invalidate it"""
+        entry = self._user_cache.get(user_id)
+        if entry and time.time() - entry[0] < self._user_cache_ttl:
+            return entry[1]
+
+        row = self.get_user(user_id)
+        self._user_cache[user_id] = (time.time(), row)
+        return row
+
+    def _invalidate_user(self, user_id: int) -> None:
+        self._user_cache.pop(user_id, None)
+
     def get_user(self, user_id: int) -> Optional[Dict]:
         try:
-            response = self.supabase.table('users').select('*').eq('user_id', user_id).execute()
+            response = self._users.select('*').eq('user_id', user_id).execute()
             
             if response.data and len(response.data) > 0:
                 user = response.data[0]
@@ -44,14 +126,15 @@ class DatabaseManager:
 
     def create_user(self, user_id: int, username: str) -> None:
         try:
-            now = datetime.now().isoformat()
-            self.supabase.table('users').insert({
+            now = self._now_iso()
+            self._users.insert({
                 'user_id': user_id,
                 'username': username,
                 'credits': 1,
                 'first_seen': now,
                 'last_active': now
             }).execute()
+            self._invalidate_user(user_id)
             
         except Exception as e:
             print(f"Error creating user: {str(e)}")
@@ -59,8 +142,8 @@ class DatabaseManager:
 
     def update_user_activity(self, user_id: int) -> None:
         try:
-            self.supabase.table('users').update({
-                'last_active': datetime.now().isoformat()
+            self._users.update({
+                'last_active': self._now_iso()
             }).eq('user_id', user_id).execute()
             
         except Exception as e:
@@ -70,7 +153,7 @@ class DatabaseManager:
     def deduct_credits(self, user_id: int, credits_required: int = 1) -> bool:
         try:
             # Get current credits
-            response = self.supabase.table('users').select('credits').eq('user_id', user_id).execute()
+            response = self._users.select('credits').eq('user_id', user_id).execute()
             
             if not response.data or len(response.data) == 0:
                 return False
@@ -79,9 +162,10 @@ class DatabaseManager:
             
             if current_credits >= credits_required:
                 # Deduct exact amount of credits needed
-                self.supabase.table('users').update({
+                self._users.update({
                     'credits': current_credits - credits_required
                 }).eq('user_id', user_id).execute()
+                self._invalidate_user(user_id)
                 return True
                 
             return False
@@ -95,10 +179,10 @@ class DatabaseManager:
 
     def log_analysis(self, user_id: int, token_address: str, status: str, result_files: str = None) -> None:
         try:
-            self.supabase.table('analysis_history').insert({
+            self._history.insert({
                 'user_id': user_id,
                 'token_address': token_address,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self._now_iso(),
                 'status': status,
                 'result_files': result_files
             }).execute()
@@ -111,6 +195,7 @@ class DatabaseManager:
 
     async def store_payment(self, payment_data: Dict) -> bool:
         try:
+            now = self._now_iso()
             data = {
                 'user_id': payment_data['user_id'],
                 'payment_id': payment_data['payment_id'],
@@ -124,21 +209,17 @@ class DatabaseManager:
                 'network': payment_data.get('network', 'eth'),
                 'order_id': payment_data['order_id'],
                 'expiration': payment_data.get('expiration'),
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat(),
+                'created_at': now,
+                'updated_at': now,
                 'provider_data': payment_data.get('provider_data', {})
             }
 
-            for attempt in range(3):
-                try:
-                    response = self.supabase.table('payments').insert(data).execute()
+            async for attempt in self._retrying():
+                with attempt:
+                    response = self._payments.insert(data).execute()
                     if response.data:
                         self.logger.info(f"Payment {payment_data['payment_id']} stored successfully")
                         return True
-                except Exception as e:
-                    if attempt == 2:
-                        raise e
-                    await asyncio.sleep(1)
 
             return False
 
@@ -149,7 +230,7 @@ class DatabaseManager:
     async def get_payment(self, payment_id: str) -> Optional[Dict]:
         """Retrieve payment information"""
         try:
-            response = self.supabase.table('payments').select('*').eq('payment_id', payment_id).execute()
+            response = self._payments.select('*').eq('payment_id', payment_id).execute()
             if response.data and len(response.data) > 0:
                 return response.data[0]
             return None
@@ -159,9 +240,9 @@ class DatabaseManager:
 
     async def update_payment_status(self, payment_id: str, status: str) -> bool:
         try:
-            response = self.supabase.table('payments').update({
+            response = self._payments.update({
                 'status': status,
-                'updated_at': datetime.now().isoformat()
+                'updated_at': self._now_iso()
             }).eq('payment_id', payment_id).execute()
             
             return bool(response.data)
@@ -186,28 +267,24 @@ class DatabaseManager:
                 return False
 
             # Execute credit addition with retries
-            for attempt in range(3):
-                try:
+            async for attempt in self._retrying():
+                with attempt:
                     # Update credits directly
-                    response = self.supabase.table('users').update({
-                        'credits': self.supabase.table('users')
+                    response = self._users.update({
+                        'credits': self._users
                         .select('credits')
                         .eq('user_id', user_id)
                         .execute()
                         .data[0]['credits'] + credits,
-                        'last_active': datetime.now().isoformat()
+                        'last_active': self._now_iso()
                     }).eq('user_id', user_id).execute()
 
                     if response.data:
                         # Log successful credit addition
                         self.logger.info(f"Added {credits} credits to user {user_id}")
+                        self._invalidate_user(user_id)
                         return True
 
-                except Exception as e:
-                    if attempt == 2:  # Last attempt
-                        raise e
-                    await asyncio.sleep(1 * (attempt + 1))  # Exponential backoff
-
             return False
 
         except Exception as e:
@@ -219,7 +296,7 @@ class DatabaseManager:
         """Validate user exists in database"""
         try:
             # Get user data directly without await
-            response = self.supabase.table('users').select('user_id').eq('user_id', user_id).execute()
+            response = self._users.select('user_id').eq('user_id', user_id).execute()
             return bool(response.data)
         except Exception as e:
             self.logger.error(f"User validation error: {str(e)}")
@@ -228,39 +305,46 @@ class DatabaseManager:
     async def _log_credit_transaction(self, user_id: int, amount: int, source: str):
         """Log credit transaction for audit trail"""
         try:
-            await self.supabase.table('credit_logs').insert({
+            await self._credit_logs.insert({
                 'user_id': user_id,
                 'amount': amount,
                 'source': source,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self._now_iso()
             }).execute()
         except Exception as e:
             self.logger.error(f"Failed to log credit transaction: {str(e)}")
 
     async def get_user_pending_payment(self, user_id: int) -> Optional[Dict]:
         try:
-            response = self.supabase.table('payments').select('''
-                payment_id,
-                package_name,
-                credits,
-                amount_crypto,
-                currency,
-                status,
-                network,
-                order_id,
-                pay_address
-            ''').eq('user_id', user_id).eq('status', 'pending').execute()
-            
-            return response.data[0] if response.data else None
+            response = self._payments.select(
+                'payment_id,package_name,credits,amount_crypto,currency,'
+                'status,network,order_id,pay_address'
+            ).eq('user_id', user_id).eq('status', 'pending') \
+                .order('created_at', desc=True).limit(1).maybe_single().execute()
+
+            return response.data if response and response.data else None
         except Exception as e:
             self.logger.error(f"Error getting pending payment: {str(e)}")
             return None
 
+    def try_reserve_credits(self, user_id: int, amount: int = 1) -> bool:
+        """Atomically deduct credits if the balance is sufficient (single RPC)"""
+        try:
+            response = self.supabase.rpc('reserve_credits', {
+                'p_user_id': user_id,
+                'p_amount': amount
+            }).execute()
+            self._invalidate_user(user_id)
+            return bool(response.data)
+        except Exception as e:
+            self.logger.error(f"Error reserving credits: {str(e)}")
+            return False
+
     def use_credit(self, user_id: int, amount: int = 1) -> bool:
         """Deduct credits from user account"""
         try:
             # Get current credits
-            response = self.supabase.table('users').select('credits').eq('user_id', user_id).execute()
+            response = self._users.select('credits').eq('user_id', user_id).execute()
             
             if not response.data or len(response.data) == 0:
                 return False
@@ -269,10 +353,11 @@ class DatabaseManager:
             
             if current_credits >= amount:
                 # Deduct exact amount of credits needed
-                self.supabase.table('users').update({
+                self._users.update({
                     'credits': current_credits - amount,
-                    'last_active': datetime.now().isoformat()
+                    'last_active': self._now_iso()
                 }).eq('user_id', user_id).execute()
+                self._invalidate_user(user_id)
                 
                 # No need to log credit deduction for now
                 # We can add credit_logs table later if needed
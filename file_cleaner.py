@@ -1,10 +1,9 @@
 import os
 import time
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-import schedule
-import threading
 
 # Configure logging
 logging.basicConfig(
@@ -66,38 +65,42 @@ class FileCleaner:
         except Exception as e:
             logger.error(f"Error during file cleaning: {str(e)}")
 
-    def start(self):
-        """Start the file cleaning scheduler"""
+    async def sweep_once(self, context=None):
+        """One cleaning pass, safe to schedule on the bot's event loop.
+
+        The directory scan and deletes run in a worker thread so a slow
+        disk never stalls update handling; accepts the unused context
+        argument PTB passes to scheduled callbacks.
+        """
+        await asyncio.to_thread(self.clean_old_files)
+
+    async def run_forever(self, interval: float = 60):
+        """Periodic sweep loop for the bot's asyncio loop.
+
+        Replaces the old scheduler thread: no GIL contention from a
+        second thread waking every second, and shutdown is a flag flip or
+        task cancellation instead of a join race.
+        """
         if self.is_running:
             logger.warning("File cleaner is already running")
             return
-            
-        def run_scheduler():
-            self.is_running = True
-            logger.info("File cleaner started")
-            
-            # Schedule cleaning every minute
-            schedule.every(1).minutes.do(self.clean_old_files)
-            
-            # Run the scheduler
+
+        self.is_running = True
+        logger.info("File cleaner started")
+        try:
             while self.is_running:
-                schedule.run_pending()
-                time.sleep(1)
-        
-        # Start scheduler in a separate thread
-        self.scheduler_thread = threading.Thread(target=run_scheduler)
-        self.scheduler_thread.daemon = True
-        self.scheduler_thread.start()
+                await asyncio.sleep(interval)
+                if self.is_running:
+                    await self.sweep_once()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.is_running = False
+            logger.info("File cleaner stopped")
 
     def stop(self):
-        """Stop the file cleaning scheduler"""
-        if not self.is_running:
-            logger.warning("File cleaner is not running")
-            return
-            
+        """Signal the sweep loop to exit after its current tick"""
         self.is_running = False
-        self.scheduler_thread.join()
-        logger.info("File cleaner stopped")
 
 def main():
     # Create and start the file cleaner
@@ -109,12 +112,11 @@ def main():
     )
     
     try:
-        cleaner.start()
         logger.info("Press Ctrl+C to stop the file cleaner")
         while True:
-            time.sleep(1)
+            time.sleep(60)
+            cleaner.clean_old_files()
     except KeyboardInterrupt:
-        cleaner.stop()
         logger.info("File cleaner stopped by user")
 
 if __name__ == "__main__":
@@ -6,7 +6,23 @@ from .error_handlers import ErrorHandler
 from .text_handlers import TextHandler
 from telegram.error import BadRequest
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from batched_sender import BatchedSender
+from analysis_spec import get_analysis_spec
+import asyncio
 import logging
+import re
+
+# Built once at import; per-callback work is a single .format() call
+_ADDR_PROMPT_TMPL = (
+    "🔍 {label} Analysis Selected\n\n"
+    "• Will analyze top {holders} holders\n"
+    "Please paste the token address below:\n"
+    "Example: `0x4F9Fd6Be4a90f2620860d680c0d4d5Fb53d1A825`"
+)
+
+# Compiled once; extracts and validates the analyze callback in one match,
+# so malformed callback_data never reaches the queue
+_ANALYZE_CB = re.compile(r'^analyze_(quick|deep)_(0x[0-9a-fA-F]{40})$')
 
 class HandlerManager:
     def __init__(self, db_manager, analyzer_queue, menu_handler, message_formatter, bot_commands, session_manager=None):
@@ -16,11 +32,23 @@ class HandlerManager:
         self.message_formatter = message_formatter
         self.bot_commands = bot_commands
         self.session_manager = session_manager
-        self.analysis_handler = AnalysisHandler(db_manager, analyzer_queue, menu_handler, session_manager)
+        # One shared sender so bursts across handlers coalesce per chat
+        self.sender = BatchedSender(analyzer_queue)
+        self.analysis_handler = AnalysisHandler(db_manager, analyzer_queue, menu_handler, session_manager, sender=self.sender)
         self.view_handler = ViewHandler(analyzer_queue, message_formatter)
-        self.error_handler = ErrorHandler(analyzer_queue)
+        self.error_handler = ErrorHandler(analyzer_queue, sender=self.sender)
         self.text_handler = TextHandler(db_manager, menu_handler, analyzer_queue, bot_commands, session_manager)
+        if menu_handler.sender is None:
+            menu_handler.sender = self.sender
         self.logger = logging.getLogger('TokenAnalyzer')
+        # Keep references to fire-and-forget DB tasks so they aren't garbage collected
+        self._bg_tasks = set()
+
+    def _run_in_background(self, func, *args):
+        """Run a non-critical DB write off the handler hot path"""
+        task = asyncio.create_task(asyncio.to_thread(func, *args))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
 
     async def handle_callback(self, update, context):
         query = update.callback_query
@@ -29,7 +57,7 @@ class HandlerManager:
             
             if self.session_manager:
                 session = self.session_manager.get_session(query.from_user.id)
-            
+
             if query.data.startswith('view_'):
                 await self.handle_view_callback(query)
             elif query.data.startswith('analyze_'):
@@ -95,7 +123,7 @@ class HandlerManager:
             
             elif query.data == "menu_credits":
                 # Show credits menu
-                user_data = self.db_manager.get_user(query.from_user.id)
+                user_data = await asyncio.to_thread(self.db_manager.get_user_cached, query.from_user.id)
                 if user_data:
                     credit_text = (
                         f"💳 *Credit Information*\n\n"
@@ -165,8 +193,7 @@ class HandlerManager:
 
     async def handle_analysis_type_selection(self, query):
         analysis_type = "deep" if query.data == "select_deep" else "quick"
-        credits_needed = 5 if analysis_type == "deep" else 1
-        holders = 50 if analysis_type == "deep" else 10
+        credits_needed, holders, label = get_analysis_spec(analysis_type)
         
         user_id = query.from_user.id
         
@@ -174,12 +201,7 @@ class HandlerManager:
         session.temp_data['analysis_type'] = analysis_type
         self.session_manager.update_state(user_id, UserState.AWAITING_ADDRESS)
         
-        prompt_text = (
-            f"🔍 {analysis_type.title()} Analysis Selected\n\n"
-            f"• Will analyze top {holders} holders\n"
-            f"Please paste the token address below:\n"
-            f"Example: `0x4F9Fd6Be4a90f2620860d680c0d4d5Fb53d1A825`"
-        )
+        prompt_text = _ADDR_PROMPT_TMPL.format(label=label, holders=holders)
         
         try:
             await query.message.edit_text(
@@ -196,31 +218,31 @@ class HandlerManager:
 
     async def handle_analysis_start(self, query):
         """Handle starting token analysis"""
-        parts = query.data.split("_")
-        if len(parts) != 3:
+        match = _ANALYZE_CB.match(query.data)
+        if not match:
             return
-        
-        analysis_type = parts[1]
-        token_address = parts[2]
-        
-        user_data = self.db_manager.get_user(query.from_user.id)
-        required_credits = 5 if analysis_type == "deep" else 1
-        
-        if not user_data or user_data['credits'] < required_credits:
-            await self.analyzer_queue.send_message(
-                chat_id=query.message.chat_id,
-                text=f"❌ Insufficient credits. Need {required_credits} credits.\n"
-                     f"Your balance: {user_data['credits'] if user_data else 0}"
-            )
-            return
-        
-        await self.analyzer_queue.add_task(
+        analysis_type, token_address = match.groups()
+
+        # No credit precheck here: add_task reserves credits atomically and
+        # reports the insufficient-credits case itself, saving a DB round trip
+        queued = await self.analyzer_queue.add_task(
             token_address=token_address,
             chat_id=query.message.chat_id,
             user_id=query.from_user.id,
             analysis_type=analysis_type
         )
 
+        # Audit only requests that actually entered the queue — add_task
+        # returns False on insufficient credits and duplicates. The write
+        # doesn't block the user-visible response
+        if queued:
+            self._run_in_background(
+                self.db_manager.log_analysis,
+                query.from_user.id,
+                token_address,
+                'queued'
+            )
+
     async def handle_view_callback(self, query):
         """Handle view-related callbacks"""
         try:
@@ -233,8 +255,9 @@ class HandlerManager:
                 )
                 return
 
-            # Extract view type from callback data
-            view_type = query.data.split('_')[1]
+            # Extract view type from callback data without a full split
+            _, _, rest = query.data.partition('_')
+            view_type, _, _ = rest.partition('_')
 
             # Handle different view types
             if view_type == 'summary':
@@ -259,14 +282,17 @@ class HandlerManager:
                 )
 
             elif view_type == 'holders':
-                holders_message = self.message_formatter.format_holders_table(
+                # Pre-chunked by the formatter — send each piece directly
+                # instead of splitting one monolithic table string
+                holders_messages = self.message_formatter.format_holders_messages(
                     analysis_data['holders_analysis']
                 )
-                await self.analyzer_queue.split_and_send_message(
-                    chat_id=query.message.chat_id,
-                    text=holders_message,
-                    parse_mode='Markdown'
-                )
+                for holders_message in holders_messages:
+                    await self.analyzer_queue.send_message(
+                        chat_id=query.message.chat_id,
+                        text=holders_message,
+                        parse_mode='Markdown'
+                    )
 
         except Exception as e:
             self.logger.error(f"Error handling view callback: {str(e)}")
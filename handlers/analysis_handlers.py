@@ -1,28 +1,31 @@
 # handlers/analysis_handlers.py
+import asyncio
 import logging
 from telegram.error import BadRequest
+from batched_sender import BatchedSender
+from analysis_spec import get_analysis_spec
 
 class AnalysisHandler:
-    def __init__(self, db_manager, analyzer_queue, menu_handler, session_manager=None):
+    def __init__(self, db_manager, analyzer_queue, menu_handler, session_manager=None, sender=None):
         self.db_manager = db_manager
         self.analyzer_queue = analyzer_queue
         self.menu_handler = menu_handler
         self.session_manager = session_manager
+        self.sender = sender or BatchedSender(analyzer_queue)
         self.logger = logging.getLogger('TokenAnalyzer')
 
     async def handle_analysis_type_selection(self, query, context):
         analysis_type = "quick" if query.data == "select_quick" else "deep"
-        credits = 1 if analysis_type == "quick" else 5
-        holders = 10 if analysis_type == "quick" else 50
+        credits, holders, _ = get_analysis_spec(analysis_type)
         
         # Store in user session and context
         context.user_data['analysis_type'] = analysis_type
         session = self.session_manager.get_session(query.from_user.id)
         session.temp_data['analysis_type'] = analysis_type  # Temporary storage
         
-        user_data = self.db_manager.get_user(query.from_user.id)
+        user_data = await asyncio.to_thread(self.db_manager.get_user_cached, query.from_user.id)
         if not user_data or user_data['credits'] < credits:
-            await self.analyzer_queue.send_message(
+            await self.sender.enqueue(
                 chat_id=query.message.chat_id,
                 text=f"❌ Insufficient credits. Need {credits} credits.\n"
                      f"Your balance: {user_data['credits'] if user_data else 0}"
@@ -42,7 +45,7 @@ class AnalysisHandler:
                 parse_mode='Markdown'
             )
         except BadRequest:
-            await self.analyzer_queue.send_message(
+            await self.sender.enqueue(
                 chat_id=query.message.chat_id,
                 text=address_prompt,
                 parse_mode='Markdown'
@@ -53,19 +56,18 @@ class AnalysisHandler:
         analysis_type = parts[1]
         token_address = parts[2]
         
-        user_data = self.db_manager.get_user(query.from_user.id)
-        required_credits = 5 if analysis_type == "deep" else 1
-        num_holders = 50 if analysis_type == "deep" else 10
+        user_data = await asyncio.to_thread(self.db_manager.get_user_cached, query.from_user.id)
+        required_credits, num_holders, _ = get_analysis_spec(analysis_type)
         
         if not user_data or user_data['credits'] < required_credits:
-            await self.analyzer_queue.send_message(
+            await self.sender.enqueue(
                 chat_id=query.message.chat_id,
                 text=f"❌ Insufficient credits. Need {required_credits} credits.\n"
                      f"Your balance: {user_data['credits'] if user_data else 0}"
             )
             return
         
-        await self.analyzer_queue.send_message(
+        await self.sender.enqueue(
             chat_id=query.message.chat_id,
             text=f"🔄 Starting {analysis_type} analysis...\n"
                  f"Analyzing top {num_holders} holders\n"
@@ -81,7 +83,7 @@ class AnalysisHandler:
         
         if isinstance(result, dict) and result.get('error'):
             # If there's an error message, send it to the user
-            await self.analyzer_queue.send_message(
+            await self.sender.enqueue(
                 chat_id=query.message.chat_id,
                 text=result['message'],
                 parse_mode='Markdown'
@@ -1,6 +1,5 @@
 # handlers/error_handlers.py
 import logging
-import traceback
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.error import (
@@ -12,13 +11,44 @@ from telegram.error import (
     RetryAfter
 )
 import asyncio
+import time
+from batched_sender import BatchedSender
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+# Static messages keyed by exception class; looked up along the MRO so
+# subclasses inherit their parent's message without an isinstance chain
+_ERROR_MESSAGES = {
+    Forbidden: "❌ Bot lacks necessary permissions. Please check bot permissions.",
+    BadRequest: "❌ Invalid request. Please try again or use /start.",
+    TimedOut: "⚠️ Request timed out. Please try again.",
+    NetworkError: "⚠️ Network error occurred. Please try again later.",
+    TelegramError: "❌ Telegram error occurred. Please try again later.",
+}
+
+_DEFAULT_ERROR_MESSAGE = "❌ An error occurred. Please try again or use /start."
 
 class ErrorHandler:
-    def __init__(self, analyzer_queue):
+    def __init__(self, analyzer_queue, sender=None):
         self.analyzer_queue = analyzer_queue
+        self.sender = sender or BatchedSender(analyzer_queue)
         self.logger = logging.getLogger('TokenAnalyzer')
         self.max_retries = 3
         self.base_delay = 1  # Base delay in seconds
+        # chat_id -> monotonic wake time; RetryAfter is per-chat, so only
+        # the flood-controlled chat waits, not every flow through here
+        self._chat_cooldown = {}
+
+    @retry(wait=wait_exponential_jitter(initial=0.5, max=8),
+           stop=stop_after_attempt(3),
+           retry=retry_if_exception_type((NetworkError, TimedOut)),
+           reraise=True)
+    async def _safe_send(self, chat_id: int, text: str):
+        """Send a notification with jittered backoff on transient failures"""
+        wake = self._chat_cooldown.get(chat_id, 0)
+        remaining = wake - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        await self.sender.enqueue(chat_id=chat_id, text=text)
 
     async def handle_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle errors that occur during bot operation"""
@@ -34,20 +64,11 @@ class ErrorHandler:
             if update and update.effective_chat:
                 chat_id = update.effective_chat.id
                 error_message = self._get_user_friendly_error_message(context.error)
-                
-                # Try to send error message with retries
-                for attempt in range(self.max_retries):
-                    try:
-                        await self.analyzer_queue.send_message(
-                            chat_id=chat_id,
-                            text=error_message
-                        )
-                        break
-                    except (NetworkError, TimedOut) as e:
-                        if attempt == self.max_retries - 1:
-                            self.logger.error(f"Failed to send error message after {self.max_retries} attempts")
-                        else:
-                            await asyncio.sleep(self.base_delay * (attempt + 1))
+
+                try:
+                    await self._safe_send(chat_id, error_message)
+                except (NetworkError, TimedOut):
+                    self.logger.error(f"Failed to send error message after {self.max_retries} attempts")
             
             self._log_error(update, context)
             
@@ -55,99 +76,67 @@ class ErrorHandler:
             self.logger.error(f"Error in error handler: {str(e)}")
 
     async def _handle_retry_after(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle RetryAfter errors"""
+        """Handle RetryAfter errors with a per-chat cooldown instead of a global sleep"""
         retry_after = context.error.retry_after
         self.logger.warning(f'RetryAfter: {retry_after}')
-        await asyncio.sleep(retry_after)
-        
+
         if update and update.effective_chat:
-            await self.analyzer_queue.send_message(
-                chat_id=update.effective_chat.id,
-                text="⚠️ Rate limit reached. Please wait a moment and try again."
+            chat_id = update.effective_chat.id
+            self._chat_cooldown[chat_id] = time.monotonic() + retry_after
+            await self._safe_send(
+                chat_id,
+                "⚠️ Rate limit reached. Please wait a moment and try again."
             )
 
     async def _handle_network_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle NetworkError with retries"""
-        for attempt in range(self.max_retries):
+        """Notify the user once; backoff lives in _safe_send, not here"""
+        if update and update.effective_chat:
             try:
-                if update and update.effective_chat:
-                    await self.analyzer_queue.send_message(
-                        chat_id=update.effective_chat.id,
-                        text="⚠️ Network error occurred. Retrying..."
-                    )
-                    
-                # Wait with exponential backoff
-                await asyncio.sleep(self.base_delay * (2 ** attempt))
-                return
-                
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    self.logger.error(f"Network error persists after {self.max_retries} retries: {str(e)}")
-                    if update and update.effective_chat:
-                        try:
-                            await self.analyzer_queue.send_message(
-                                chat_id=update.effective_chat.id,
-                                text="❌ Network error. Please try again later."
-                            )
-                        except:
-                            pass
+                await self._safe_send(
+                    update.effective_chat.id,
+                    "⚠️ Network error occurred. Please try again in a few moments."
+                )
+            except (NetworkError, TimedOut) as e:
+                self.logger.error(f"Network error persists after {self.max_retries} retries: {str(e)}")
 
     def _get_user_friendly_error_message(self, error: Exception) -> str:
         """Convert exception to user-friendly message"""
-        if isinstance(error, Forbidden):
-            return "❌ Bot lacks necessary permissions. Please check bot permissions."
-        
-        elif isinstance(error, BadRequest):
-            return "❌ Invalid request. Please try again or use /start."
-        
-        elif isinstance(error, TimedOut):
-            return "⚠️ Request timed out. Please try again."
-        
-        elif isinstance(error, NetworkError):
-            return "⚠️ Network error occurred. Please try again later."
-        
-        elif isinstance(error, TelegramError):
-            return "❌ Telegram error occurred. Please try again later."
-        
-        return "❌ An error occurred. Please try again or use /start."
+        for cls in type(error).__mro__:
+            message = _ERROR_MESSAGES.get(cls)
+            if message:
+                return message
+        return _DEFAULT_ERROR_MESSAGE
 
     def _log_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Log error details for debugging"""
+        # exc_info carries the error's own traceback; a second
+        # traceback.format_exc() call would re-walk the (possibly stale)
+        # current stack and double the logging cost
         self.logger.error(
             "Exception while handling an update:",
-            exc_info=context.error
+            exc_info=context.error,
+            extra={
+                "update_id": getattr(update, 'update_id', None),
+                "chat_data": context.chat_data,
+                "user_data": context.user_data
+            }
         )
 
-        if update:
-            self.logger.error(
-                f"Update {update} caused error: {context.error}\n" +
-                f"Traceback:\n{traceback.format_exc()}"
-            )
-        
-        if context.chat_data:
-            self.logger.error(f"Chat data: {str(context.chat_data)}")
-            
-        if context.user_data:
-            self.logger.error(f"User data: {str(context.user_data)}")
-
     async def handle_timeout_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle timeout errors specifically"""
-        for attempt in range(self.max_retries):
+        if update and update.effective_chat:
             try:
-                if update and update.effective_chat:
-                    await self.analyzer_queue.send_message(
-                        chat_id=update.effective_chat.id,
-                        text="⚠️ Analysis is taking longer than expected. Retrying..."
-                    )
-                return
-            except Exception as e:
-                if attempt == self.max_retries - 1:
-                    self.logger.error(f"Timeout persists after {self.max_retries} retries: {str(e)}")
+                await self._safe_send(
+                    update.effective_chat.id,
+                    "⚠️ Analysis is taking longer than expected. Retrying..."
+                )
+            except (NetworkError, TimedOut) as e:
+                self.logger.error(f"Timeout persists after {self.max_retries} retries: {str(e)}")
 
     async def handle_rate_limit_error(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle rate limiting errors"""
         if update and update.effective_chat:
-            await self.analyzer_queue.send_message(
+            await self.sender.enqueue(
                 chat_id=update.effective_chat.id,
                 text="⚠️ Too many requests. Please wait a few minutes and try again."
             )
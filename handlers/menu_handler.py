@@ -1,45 +1,37 @@
 # menu_handler.py
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+from functools import lru_cache
+import asyncio
 import logging
+from batched_sender import BatchedSender
 
 class MenuHandler:
-    def __init__(self, db_manager=None, analyzer_queue=None, session_manager=None):
+    def __init__(self, db_manager=None, analyzer_queue=None, session_manager=None, sender=None):
         self.db_manager = db_manager
         self.analyzer_queue = analyzer_queue
         self.session_manager = session_manager
+        self.sender = sender or (BatchedSender(analyzer_queue) if analyzer_queue else None)
         self.logger = logging.getLogger('TokenAnalyzer')
+        # Message ids that already rejected an edit; skip straight to send
+        # instead of paying the exception path on every navigation
+        self._non_editable: set = set()
 
     @staticmethod
     def get_main_menu() -> InlineKeyboardMarkup:
-        keyboard = [
-            [InlineKeyboardButton("🔍 Analyze Token", callback_data="menu_analyze")],
-            [InlineKeyboardButton("👛 Check Credits", callback_data="menu_credits")],
-            [InlineKeyboardButton("💳 Buy Credits", callback_data="menu_buy")],
-            [InlineKeyboardButton("📜 Analysis History", callback_data="menu_history")],
-            [InlineKeyboardButton("ℹ️ Help", callback_data="menu_help")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return _MAIN_MENU
 
     @staticmethod
     def get_credits_packages_menu() -> InlineKeyboardMarkup:
-        keyboard = [
-            [InlineKeyboardButton("📦 50 Credits - $20", callback_data="buy_basic")],
-            [InlineKeyboardButton("📦 75 Credits - $30", callback_data="buy_pro")],
-            [InlineKeyboardButton("📦 100 Credits - $40", callback_data="buy_premium")],
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return _CREDITS_PACKAGES_MENU
 
     @staticmethod
     def get_analysis_type_menu() -> InlineKeyboardMarkup:
-        keyboard = [
-            [InlineKeyboardButton("🔍 Quick Analysis - Top 10 (1 credit)", callback_data="select_quick")],
-            [InlineKeyboardButton("🔬 ", callback_data="select_deep")],
-            [InlineKeyboardButton("🔙 Back to Menu", callback_data="menu_main")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return _ANALYSIS_TYPE_MENU
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def get_analysis_options(token_address: str, analysis_type: str = "quick") -> InlineKeyboardMarkup:
         keyboard = [
             [InlineKeyboardButton("🔍 Start Analysis", callback_data=f"analyze_{analysis_type}_{token_address}")],
@@ -50,17 +42,14 @@ class MenuHandler:
 
     @staticmethod
     def get_credits_menu() -> InlineKeyboardMarkup:
-        return InlineKeyboardMarkup([[
-            InlineKeyboardButton("🔙 Back to Main Menu", callback_data="menu_main")
-        ]])
+        return _BACK_TO_MAIN_MENU
 
     @staticmethod
     def get_help_menu() -> InlineKeyboardMarkup:
-        return InlineKeyboardMarkup([[
-            InlineKeyboardButton("🔙 Back to Main Menu", callback_data="menu_main")
-        ]])
+        return _BACK_TO_MAIN_MENU
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def get_analysis_menu(token_address: str, analysis_type: str = "quick") -> InlineKeyboardMarkup:
         keyboard = [
             [InlineKeyboardButton("📊 View Summary", callback_data=f"view_summary_{token_address}")],
@@ -94,9 +83,9 @@ class MenuHandler:
             self.logger.warning(f"Unknown menu action: {query.data}")
 
     async def handle_credits_menu(self, query, context):
-        user_data = self.db_manager.get_user(query.from_user.id)
+        user_data = await asyncio.to_thread(self.db_manager.get_user_cached, query.from_user.id)
         if not user_data:
-            await self.analyzer_queue.send_message(
+            await self.sender.enqueue(
                 chat_id=query.message.chat_id,
                 text="❌ User not found. Please use /start"
             )
@@ -161,22 +150,61 @@ class MenuHandler:
         )
 
     async def handle_history_menu(self, query, context):
-        await self.analyzer_queue.send_message(
+        await self.sender.enqueue(
             chat_id=query.message.chat_id,
             text="📜 Analysis history feature coming soon!"
         )
 
     async def send_or_edit_message(self, query, text, markup=None, parse_mode='Markdown'):
-        try:
-            await query.edit_message_text(
-                text=text,
-                reply_markup=markup,
-                parse_mode=parse_mode
-            )
-        except Exception as e:
-            await self.analyzer_queue.send_message(
-                chat_id=query.message.chat_id,
-                text=text,
-                reply_markup=markup,
-                parse_mode=parse_mode
-            )
\ No newline at end of file
+        # Telegram message ids are per-chat counters, so the key must
+        # include the chat or message N in one chat would shadow N in all
+        key = (query.message.chat_id, query.message.message_id)
+        if key not in self._non_editable:
+            try:
+                await query.edit_message_text(
+                    text=text,
+                    reply_markup=markup,
+                    parse_mode=parse_mode
+                )
+                return
+            except BadRequest as e:
+                if "message is not modified" in str(e).lower():
+                    return
+                # Message can't be edited (too old, deleted, not ours);
+                # remember it so we don't retry the edit next time
+                self._non_editable.add(key)
+                if len(self._non_editable) > 1024:
+                    self._non_editable.clear()
+
+        await self.sender.enqueue(
+            chat_id=query.message.chat_id,
+            text=text,
+            reply_markup=markup,
+            parse_mode=parse_mode
+        )
+
+
+# Parameter-free markups are immutable; build them once at import
+_MAIN_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔍 Analyze Token", callback_data="menu_analyze")],
+    [InlineKeyboardButton("👛 Check Credits", callback_data="menu_credits")],
+    [InlineKeyboardButton("💳 Buy Credits", callback_data="menu_buy")],
+    [InlineKeyboardButton("📜 Analysis History", callback_data="menu_history")],
+    [InlineKeyboardButton("ℹ️ Help", callback_data="menu_help")]
+])
+
+_CREDITS_PACKAGES_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📦 50 Credits - $20", callback_data="buy_basic")],
+    [InlineKeyboardButton("📦 75 Credits - $30", callback_data="buy_pro")],
+    [InlineKeyboardButton("📦 100 Credits - $40", callback_data="buy_premium")],
+])
+
+_ANALYSIS_TYPE_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔍 Quick Analysis - Top 10 (1 credit)", callback_data="select_quick")],
+    [InlineKeyboardButton("🔬 ", callback_data="select_deep")],
+    [InlineKeyboardButton("🔙 Back to Menu", callback_data="menu_main")]
+])
+
+_BACK_TO_MAIN_MENU = InlineKeyboardMarkup([[
+    InlineKeyboardButton("🔙 Back to Main Menu", callback_data="menu_main")
+]])
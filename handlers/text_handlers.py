@@ -7,7 +7,9 @@ import logging
 import time
 import asyncio
 from typing import Dict, Set, Optional
-import re
+from collections import OrderedDict
+from analysis_spec import get_analysis_spec
+from session_manager import RateLimitAction
 from web3.exceptions import ContractLogicError
 from datetime import datetime
 from enum import Enum
@@ -15,6 +17,20 @@ from enum import Enum
 class AddressValidationError(Exception):
    pass
 
+# Prehashed, lowercased once at import so the per-message check is a single probe
+RESTRICTED_ADDRESSES = frozenset(addr.lower() for addr in (
+    "0x35762b6E2d33B906f275103Aaf9Da814A1ff42b6",
+))
+
+# Built once at import; per-message work is a single .format() call
+_CONFIRMATION_TMPL = (
+    "🔍 *Token Address Verified*\n\n"
+    "Address: `{address}`\n"
+    "Analysis: {label}\n"
+    "Holders: {holders}\n"
+    "Ready to start analysis?"
+)
+
 class UserState(Enum):
    MAIN_MENU = "main_menu" 
    AWAITING_ADDRESS = "awaiting_address"
@@ -33,30 +49,34 @@ class TextHandler:
         self.max_retries = 3
         self.base_retry_delay = 1
         self.rate_limit_cooldown = 30
-        self.restricted_addresses: Set[str] = {
-            "0x35762b6E2d33B906f275103Aaf9Da814A1ff42b6",
-        }
-        self.validation_cache: Dict[str, Dict] = {}
-        self.cache_ttl = 3600
+        self.restricted_addresses: Set[str] = RESTRICTED_ADDRESSES
+        # LRU of lowercase address -> checksum result; skips the keccak hash
+        # inside to_checksum_address on repeat submissions
+        self.validation_cache: OrderedDict[str, str] = OrderedDict()
+        self.validation_cache_size = 4096
+        # Checksum address -> (timestamp, has_code); bytecode at an address is
+        # effectively immutable on session timescales
+        self._code_cache: Dict[str, tuple] = {}
+        self._code_cache_ttl = 3600
+        # Fire-and-forget deletes held here so they aren't garbage collected
+        self._bg_tasks: Set[asyncio.Task] = set()
 
     async def handle_text_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not update.message or not update.message.text:
             return
 
         user_id = update.effective_user.id
+
+        # Cheap pre-check before building a session or formatting log lines;
+        # most group-chat messages are noise we ignore entirely
+        if self.session_manager.peek_state(user_id) != UserState.AWAITING_ADDRESS:
+            return
+
         text = update.message.text.strip()
         session = self.session_manager.get_session(user_id)
-
-        # Add debug logging
-        self.logger.info(f"Received text message: {text} from user {user_id}")
-        self.logger.info(f"Current session state: {session.state}")
+        self.logger.debug(f"Received text message: {text} from user {user_id}")
 
         try:
-            # Check if waiting for address
-            if session.state != UserState.AWAITING_ADDRESS:
-                self.logger.info(f"Not awaiting address. Current state: {session.state}")
-                return
-
             # Validate address format
             if not text.startswith('0x'):
                 await update.message.reply_text(
@@ -89,39 +109,37 @@ class TextHandler:
             session.temp_data['analysis_type'] = analysis_type
 
         # Set correct parameters based on analysis type
-        credits_needed = 5 if analysis_type == 'deep' else 1
-        holders = 50 if analysis_type == 'deep' else 10
+        credits_needed, holders, label = get_analysis_spec(analysis_type)
 
         try:
-            # Validate address format and checksum
-            
-            validation_result = await self._validate_address(address)
-            if not validation_result['valid']:
-                raise AddressValidationError(validation_result['message'])
-
-            checksummed_address = validation_result['address']
-
-            # Check restricted addresses
-            if self._is_restricted_address(checksummed_address):
-                raise AddressValidationError(
-                    '''They asked the tree, "What do you fear the most?" The tree replied, "The axe, because its handle is made from my own wood."\n'''
-                    "Please provide a different token contract address."
-                )
-
-            # Show progress while verifying contract
-            progress_msg = await update.message.reply_text("🔍 Verifying contract...")
+            # Only surface the progress notice if verification is actually
+            # slow; the fast path then costs zero extra API calls. The
+            # validate/checksum/code pipeline and the credit lookup are
+            # independent, so run them concurrently
+            progress_task = asyncio.create_task(self._delayed_progress(update, 0.4))
             try:
-                if not await self._verify_contract(checksummed_address):
-                    await progress_msg.edit_text(
+                (checksummed_address, is_contract), user_data = await asyncio.gather(
+                    self._prepare_contract(address),
+                    asyncio.to_thread(self.db_manager.get_user_cached, user_id)
+                )
+                if not is_contract:
+                    await update.message.reply_text(
                         "❌ This address is not a contract.\n"
                         "Please provide a valid token contract address."
                     )
                     return
             finally:
-                await progress_msg.delete()
+                progress_task.cancel()
+                if progress_task.done() and not progress_task.cancelled():
+                    progress_msg = progress_task.result()
+                    if progress_msg:
+                        # Delete in the background; the user doesn't need to
+                        # wait on this round-trip
+                        task = asyncio.create_task(self._safe_delete(progress_msg))
+                        self._bg_tasks.add(task)
+                        task.add_done_callback(self._bg_tasks.discard)
 
             # Check user has enough credits
-            user_data = self.db_manager.get_user(user_id)
             if not user_data or user_data['credits'] < credits_needed:
                 await update.message.reply_text(
                     f"❌ Insufficient credits. Need {credits_needed} credits.\n"
@@ -137,12 +155,10 @@ class TextHandler:
 
 
             # Send confirmation message
-            confirmation_text = (
-                f"🔍 *Token Address Verified*\n\n"
-                f"Address: `{checksummed_address}`\n"
-                f"Analysis: {analysis_type.title()}\n" 
-                f"Holders: {holders}\n"
-                f"Ready to start analysis?"
+            confirmation_text = _CONFIRMATION_TMPL.format(
+                address=checksummed_address,
+                label=label,
+                holders=holders
             )
 
             await update.message.reply_text(
@@ -162,11 +178,42 @@ class TextHandler:
             await self._handle_error(update, e)
             self.session_manager.update_state(user_id, UserState.MAIN_MENU)
 
-    async def _validate_address(self, address: str) -> Dict:
-        """Validate ethereum address format and checksum"""
+    async def _prepare_contract(self, raw: str) -> tuple:
+        """Validate, checksum and contract-check an address in one coroutine.
+
+        Fuses the previously separate validate/checksum/verify steps into a
+        single await point; raises AddressValidationError on any failure.
+        """
+        result = self._validate_address(raw)
+        if not result['valid']:
+            raise AddressValidationError(result['message'])
+
+        checksummed_address = result['address']
+
+        if self._is_restricted_address(checksummed_address):
+            raise AddressValidationError(
+                '''They asked the tree, "What do you fear the most?" The tree replied, "The axe, because its handle is made from my own wood."\n'''
+                "Please provide a different token contract address."
+            )
+
+        return checksummed_address, await self._verify_contract(checksummed_address)
+
+    def _validate_address(self, address: str) -> Dict:
+        """Validate ethereum address format and checksum (pure CPU, no await)"""
         try:
-            # Check basic format
-            if not re.match(r'^0x[a-fA-F0-9]{40}$', address):
+            # Check basic format: 0x + 40 hex chars. bytes.fromhex does the
+            # hex validation in C, much cheaper than a regex match
+            if len(address) != 42 or address[0] != '0' or address[1] not in 'xX':
+                return {
+                    'valid': False,
+                    'message': (
+                        "❌ Invalid address format.\n"
+                        "Address must be 42 characters long and contain only hex characters."
+                    )
+                }
+            try:
+                bytes.fromhex(address[2:])
+            except ValueError:
                 return {
                     'valid': False,
                     'message': (
@@ -175,8 +222,16 @@ class TextHandler:
                     )
                 }
 
-            # Convert to checksum address
-            checksummed_address = self.bot_commands.w3.to_checksum_address(address)
+            # Convert to checksum address (cached for repeat submissions)
+            lo = address.lower()
+            checksummed_address = self.validation_cache.get(lo)
+            if checksummed_address is not None:
+                self.validation_cache.move_to_end(lo)
+            else:
+                checksummed_address = self.bot_commands.w3.to_checksum_address(address)
+                self.validation_cache[lo] = checksummed_address
+                if len(self.validation_cache) > self.validation_cache_size:
+                    self.validation_cache.popitem(last=False)
 
             return {
                 'valid': True,
@@ -190,12 +245,34 @@ class TextHandler:
                 'message': "❌ Invalid address checksum.\nPlease verify the address and try again."
             }
 
+    @staticmethod
+    async def _safe_delete(message) -> None:
+        """Best-effort message delete; failures are irrelevant to the flow"""
+        try:
+            await message.delete()
+        except Exception:
+            pass
+
+    async def _delayed_progress(self, update: Update, delay: float):
+        """Send the verification notice only after a delay, so fast checks skip it"""
+        await asyncio.sleep(delay)
+        try:
+            return await update.message.reply_text("🔍 Verifying contract...")
+        except Exception:
+            return None
+
     async def _verify_contract(self, address: str) -> bool:
         """Verify if address is a contract with retry logic"""
+        cached = self._code_cache.get(address)
+        if cached and time.time() - cached[0] < self._code_cache_ttl:
+            return cached[1]
+
         for attempt in range(self.max_retries):
             try:
                 code = await self._get_code_with_retry(address)
-                return len(code) > 0
+                has_code = len(code) > 0
+                self._code_cache[address] = (time.time(), has_code)
+                return has_code
             except Exception as e:
                 if attempt == self.max_retries - 1:
                     raise
@@ -203,10 +280,10 @@ class TextHandler:
         return False
 
     async def _get_code_with_retry(self, address: str) -> bytes:
-        """Get contract code with retry logic"""
+        """Get contract code with retry logic without blocking the event loop"""
         for attempt in range(self.max_retries):
             try:
-                return self.bot_commands.w3.eth.get_code(address)
+                return await asyncio.to_thread(self.bot_commands.w3.eth.get_code, address)
             except Exception as e:
                 if attempt == self.max_retries - 1:
                     raise
@@ -215,15 +292,14 @@ class TextHandler:
 
     def _is_restricted_address(self, address: str) -> bool:
         """Check if address is in restricted list"""
-        return address.lower() in {addr.lower() for addr in self.restricted_addresses}
+        return address.lower() in self.restricted_addresses
 
     async def _check_user_credits(self, user_id: int, context: ContextTypes.DEFAULT_TYPE) -> Dict:
         """Check if user has sufficient credits"""
         analysis_type = context.user_data.get('analysis_type', 'quick')
-        credits_needed = 5 if analysis_type == 'deep' else 1
-        holders = 50 if analysis_type == 'deep' else 10
+        credits_needed, holders, _ = get_analysis_spec(analysis_type)
 
-        user_data = self.db_manager.get_user(user_id)
+        user_data = await asyncio.to_thread(self.db_manager.get_user_cached, user_id)
         if not user_data or user_data['credits'] < credits_needed:
             return {
                 'success': False,
@@ -249,14 +325,12 @@ class TextHandler:
         credits_needed: int
     ) -> None:
         """Send analysis confirmation message"""
-        holders = 50 if analysis_type == 'deep' else 10
-        
-        confirmation_text = (
-            f"🔍 *Token Address Verified*\n\n"
-            f"Address: `{address}`\n"
-            f"Analysis: {analysis_type.title()}\n"
-            f"Holders: {holders}\n"
-            f"Ready to start analysis?"
+        _, holders, label = get_analysis_spec(analysis_type)
+
+        confirmation_text = _CONFIRMATION_TMPL.format(
+            address=address,
+            label=label,
+            holders=holders
         )
         
         await update.message.reply_text(
@@ -284,16 +358,6 @@ class TextHandler:
     def _get_remaining_cooldown(self, user_id: int) -> int:
         """Calculate remaining cooldown time"""
         session = self.session_manager.get_session(user_id)
-        last_check = session.rate_limits.get('address_check', 0)
-        elapsed = time.time() - last_check
+        last_check = session.rate_limits[RateLimitAction.ADDRESS_CHECK]
+        elapsed = time.monotonic() - last_check
         return max(0, int(self.rate_limit_cooldown - elapsed))
-
-    def _cleanup_validation_cache(self) -> None:
-        """Clean up expired validation cache entries"""
-        current_time = time.time()
-        expired = [
-            addr for addr, data in self.validation_cache.items()
-            if current_time - data['timestamp'] > self.cache_ttl
-        ]
-        for addr in expired:
-            del self.validation_cache[addr]
\ No newline at end of file
@@ -1,40 +1,109 @@
 # handlers/view_handlers.py
+import asyncio
+import functools
+import heapq
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
 from wallet_analysis_formatter import WalletAnalysisFormatter
 
+# Minimum significance for a pattern to appear in the patterns section
+SIG_THRESHOLD = 0.7
+
+# Holder types never shown in connected wallet groups
+_EXCLUDED_ADDRESS_TYPES = frozenset(('Contract', 'Developer'))
+
+# Constant fragments of the cluster/pattern sections, built once at import
+_GROUP_HEADER = "\n👥 *Connected Wallet Groups*\n"
+_PATTERN_HEADER = "\n🔍 *Significant Patterns*\n"
+_CREATION_PATTERN_PREFIX = "• 🕒 Coordinated creation detected\n  "
+_TX_PATTERN_PREFIX = "• 💸 Related transaction pattern\n  "
+
+@functools.lru_cache(maxsize=4096)
+def _short_addr(address: str) -> str:
+    """Abbreviated address for display; memoized since wallets recur across clusters"""
+    return f"{address[:6]}...{address[-4:]}"
+
+def _view_guard(fn):
+    """Report ValueError from a section view to the chat; shared by all views"""
+    @functools.wraps(fn)
+    async def wrapper(self, query, analysis_data):
+        try:
+            await fn(self, query, analysis_data)
+        except ValueError as e:
+            await self.analyzer_queue.send_message(
+                chat_id=query.message.chat_id,
+                text=f"❌ {str(e)}"
+            )
+    return wrapper
+
 class ViewHandler:
+    # Fixed attribute set: no per-instance __dict__, faster attribute access
+    __slots__ = ('analyzer_queue', 'message_formatter', 'logger',
+                 'wallet_formatter', '_view_handlers', '_inflight',
+                 '_render_cache')
+
     def __init__(self, analyzer_queue, message_formatter):
         self.analyzer_queue = analyzer_queue
         self.message_formatter = message_formatter
         self.logger = logging.getLogger('TokenAnalyzer')
         # Add formatter initialization
         self.wallet_formatter = WalletAnalysisFormatter()
+        # Built once; both the callback entry point and refresh_view dispatch
+        # through this instead of per-call getattr or dict literals
+        self._view_handlers = {
+            'summary': self.handle_summary_view,
+            'dev': self.handle_dev_view,
+            'pattern': self.handle_pattern_view,
+            'holders': self.handle_holders_view,
+            'risk': self.handle_risk_view,
+            'full': self.handle_full_view,
+            'connections': self.handle_connections_view
+        }
+        # (user_id, view_type) -> Future for a render in flight; double-taps
+        # on the same button are dropped instead of re-running the pipeline
+        self._inflight = {}
+        # Rendered sections keyed by payload identity; the stored reference
+        # keeps the payload alive so its id cannot be recycled while cached
+        self._render_cache = {}
 
     async def handle_view_callbacks(self, query):
-        """Enhanced view callback handler with progress tracking"""
+        """View callback handler dispatching straight to the section views"""
         try:
-            # Show loading state
-            progress_message = await query.message.reply_text(
-                "📊 Loading analysis data..."
-            )
-
+            # get_analysis_results is a synchronous in-memory lookup, so a
+            # "Loading..." message would just add two Telegram round-trips
+            # (send + delete) to every view click
             analysis_data = self.analyzer_queue.get_analysis_results(query.from_user.id)
             if not analysis_data:
-                await progress_message.edit_text(
-                    "❌ Analysis data not found. Please run a new analysis."
+                await self.analyzer_queue.send_message(
+                    chat_id=query.message.chat_id,
+                    text="❌ Analysis data not found. Please run a new analysis."
                 )
                 return
 
-            view_type = query.data.split('_')[1]
-            handler_method = getattr(self, f'handle_{view_type}_view', None)
-            
+            # partition avoids allocating a list for every callback
+            _, _, rest = query.data.partition('_')
+            view_type, _, _ = rest.partition('_')
+            handler_method = self._view_handlers.get(view_type)
+
             if handler_method:
-                await handler_method(query, analysis_data)
+                key = (query.from_user.id, view_type)
+                pending = self._inflight.get(key)
+                if pending and not pending.done():
+                    await query.answer("Already loading...")
+                    return
+
+                self._inflight[key] = asyncio.get_running_loop().create_future()
+                try:
+                    await handler_method(query, analysis_data)
+                finally:
+                    self._inflight.pop(key).set_result(None)
             else:
-                await progress_message.edit_text("❌ Invalid view type requested.")
+                await self.analyzer_queue.send_message(
+                    chat_id=query.message.chat_id,
+                    text="❌ Invalid view type requested."
+                )
 
         except Exception as e:
             self.logger.error(f"View handling error: {str(e)}")
@@ -42,49 +111,51 @@ class ViewHandler:
                 chat_id=query.message.chat_id,
                 text="❌ Error displaying analysis results."
             )
-        finally:
-            # Clean up loading message
-            try:
-                await progress_message.delete()
-            except Exception:
-                pass
 
+    def _format_section(self, analysis_data, section, formatter, value=None):
+        """Format a section once per analysis payload; repeat views reuse it.
+
+        Callers that already fetched the section payload can pass it as
+        `value` to skip the re-index.
+        """
+        key = (id(analysis_data), section)
+        cached = self._render_cache.get(key)
+        if cached is not None and cached[0] is analysis_data:
+            return cached[1]
+
+        text = formatter(value if value is not None else analysis_data[section])
+        if len(self._render_cache) > 64:
+            self._render_cache.clear()
+        self._render_cache[key] = (analysis_data, text)
+        return text
+
+    @_view_guard
     async def handle_summary_view(self, query, analysis_data):
         """Handle summary view of analysis results"""
-        try:
-            self._validate_analysis_data(analysis_data, 'summary_stats')
-            summary_message = self.message_formatter.format_analysis_summary(
-                analysis_data['summary_stats'],
-                analysis_data
-            )
-            await self.analyzer_queue.split_and_send_message(
-                chat_id=query.message.chat_id,
-                text=summary_message,
-                parse_mode='Markdown'
-            )
-        except ValueError as e:
-            await self.analyzer_queue.send_message(
-                chat_id=query.message.chat_id,
-                text=f"❌ {str(e)}"
-            )
+        self._validate_analysis_data(analysis_data, 'summary_stats')
+        summary_message = self._format_section(
+            analysis_data, 'summary_stats',
+            lambda data: self.message_formatter.format_analysis_summary(data, analysis_data)
+        )
+        await self.analyzer_queue.split_and_send_message(
+            chat_id=query.message.chat_id,
+            text=summary_message,
+            parse_mode='Markdown'
+        )
 
+    @_view_guard
     async def handle_dev_view(self, query, analysis_data):
         """Handle developer analysis view"""
-        try:
-            self._validate_analysis_data(analysis_data, 'deployer_analysis')
-            dev_message = self.message_formatter.format_developer_info(
-                analysis_data['deployer_analysis']
-            )
-            await self.analyzer_queue.split_and_send_message(
-                chat_id=query.message.chat_id,
-                text=dev_message,
-                parse_mode='Markdown'
-            )
-        except ValueError as e:
-            await self.analyzer_queue.send_message(
-                chat_id=query.message.chat_id,
-                text=f"❌ {str(e)}"
-            )
+        self._validate_analysis_data(analysis_data, 'deployer_analysis')
+        dev_message = self._format_section(
+            analysis_data, 'deployer_analysis',
+            self.message_formatter.format_developer_info
+        )
+        await self.analyzer_queue.split_and_send_message(
+            chat_id=query.message.chat_id,
+            text=dev_message,
+            parse_mode='Markdown'
+        )
 
     async def handle_full_view(self, query, analysis_data):
         """Handle full analysis view with all sections"""
@@ -97,19 +168,28 @@ class ViewHandler:
                 'pattern_analysis': self.message_formatter.format_pattern_analysis
             }
             
-            messages_sent = 0
+            # Format the sections off the event loop and in parallel — they
+            # are independent CPU work — then send the lot in one call:
+            # split_and_send_message already handles the 4096-char limit, so
+            # this turns up to five serial round-trips into one or two
+            tasks = []
             for section, formatter in sections.items():
-                if section in analysis_data and analysis_data[section]:
-                    msg = formatter(analysis_data[section])
-                    await self.analyzer_queue.split_and_send_message(
-                        chat_id=query.message.chat_id,
-                        text=msg,
-                        parse_mode='Markdown'
-                    )
-                    messages_sent += 1
-            
-            if messages_sent == 0:
+                value = analysis_data.get(section)
+                if value:
+                    tasks.append(asyncio.to_thread(
+                        self._format_section, analysis_data, section, formatter, value
+                    ))
+
+            if not tasks:
                 raise ValueError("No valid analysis sections found")
+
+            parts = await asyncio.gather(*tasks)
+
+            await self.analyzer_queue.split_and_send_message(
+                chat_id=query.message.chat_id,
+                text="\n\n".join(parts),
+                parse_mode='Markdown'
+            )
                 
         except Exception as e:
             await self.analyzer_queue.send_message(
@@ -117,59 +197,57 @@ class ViewHandler:
                 text=f"❌ Error generating full analysis view: {str(e)}"
             )
 
+    @_view_guard
     async def handle_pattern_view(self, query, analysis_data):
         """Handle pattern analysis view"""
-        try:
-            self._validate_analysis_data(analysis_data, 'pattern_analysis')
-            pattern_message = self.message_formatter.format_pattern_analysis(
-                analysis_data['pattern_analysis']
-            )
-            await self.analyzer_queue.split_and_send_message(
-                chat_id=query.message.chat_id,
-                text=pattern_message,
-                parse_mode='Markdown'
-            )
-        except ValueError as e:
-            await self.analyzer_queue.send_message(
-                chat_id=query.message.chat_id,
-                text=f"❌ {str(e)}"
-            )
+        self._validate_analysis_data(analysis_data, 'pattern_analysis')
+        pattern_message = self._format_section(
+            analysis_data, 'pattern_analysis',
+            self.message_formatter.format_pattern_analysis
+        )
+        await self.analyzer_queue.split_and_send_message(
+            chat_id=query.message.chat_id,
+            text=pattern_message,
+            parse_mode='Markdown'
+        )
 
+    @_view_guard
     async def handle_holders_view(self, query, analysis_data):
         """Handle holders analysis view"""
-        try:
-            self._validate_analysis_data(analysis_data, 'holders_analysis')
-            holders_message = self.message_formatter.format_holders_table(
-                analysis_data['holders_analysis']
-            )
-            await self.analyzer_queue.split_and_send_message(
-                chat_id=query.message.chat_id,
-                text=holders_message,
-                parse_mode='Markdown'
-            )
-        except ValueError as e:
+        self._validate_analysis_data(analysis_data, 'holders_analysis')
+        # The holders table is the heaviest formatter; render it off the
+        # event loop like the full view does. Chunk-sized messages come
+        # straight from the formatter, so nothing re-splits a monolithic
+        # string and each chunk carries its own header
+        # Cached under its own key: the full view caches the monolithic
+        # table string under 'holders_analysis', and the two renderings
+        # must not shadow each other
+        holders_messages = await asyncio.to_thread(
+            self._format_section,
+            analysis_data, 'holders_messages',
+            self.message_formatter.format_holders_messages,
+            analysis_data['holders_analysis']
+        )
+        for message in holders_messages:
             await self.analyzer_queue.send_message(
                 chat_id=query.message.chat_id,
-                text=f"❌ {str(e)}"
+                text=message,
+                parse_mode='Markdown'
             )
 
+    @_view_guard
     async def handle_risk_view(self, query, analysis_data):
         """Handle risk analysis view"""
-        try:
-            self._validate_analysis_data(analysis_data, 'risk_analysis')
-            risk_message = self.message_formatter.format_risk_analysis(
-                analysis_data['risk_analysis']
-            )
-            await self.analyzer_queue.split_and_send_message(
-                chat_id=query.message.chat_id,
-                text=risk_message,
-                parse_mode='Markdown'
-            )
-        except ValueError as e:
-            await self.analyzer_queue.send_message(
-                chat_id=query.message.chat_id,
-                text=f"❌ {str(e)}"
-            )
+        self._validate_analysis_data(analysis_data, 'risk_analysis')
+        risk_message = self._format_section(
+            analysis_data, 'risk_analysis',
+            self.message_formatter.format_risk_analysis
+        )
+        await self.analyzer_queue.split_and_send_message(
+            chat_id=query.message.chat_id,
+            text=risk_message,
+            parse_mode='Markdown'
+        )
 
     async def refresh_view(self, query, view_type):
         """Refresh a specific view with updated data"""
@@ -178,16 +256,7 @@ class ViewHandler:
             if not analysis_data:
                 raise ValueError("No analysis data found")
 
-            view_type_handlers = {
-                'summary': self.handle_summary_view,
-                'dev': self.handle_dev_view,
-                'pattern': self.handle_pattern_view,
-                'holders': self.handle_holders_view,
-                'risk': self.handle_risk_view,
-                'full': self.handle_full_view
-            }
-
-            handler = view_type_handlers.get(view_type)
+            handler = self._view_handlers.get(view_type)
             if handler:
                 await handler(query, analysis_data)
             else:
@@ -218,41 +287,32 @@ class ViewHandler:
                 )
                 return
 
-            # Check for high-risk scenarios first
-            alert_message = self.wallet_formatter.get_quick_alert_message(
-                analysis_data['connection_analysis']
-            )
-            if alert_message:
-                await self.analyzer_queue.send_message(
-                    chat_id=query.message.chat_id,
-                    text=alert_message,
-                    parse_mode='Markdown'
-                )
+            connection_analysis = analysis_data['connection_analysis']
 
-            # Format and send main analysis summary
-            summary_message = self.wallet_formatter.format_analysis_summary(
-                analysis_data['connection_analysis']
-            )
-            
-            # Format and send connection details (for user wallets only)
-            if analysis_data['connection_analysis'].get('clusters'):
-                cluster_message = self._format_cluster_details(
-                    analysis_data['connection_analysis']['clusters'],
+            # Collect every segment — alert first — and send once; the
+            # splitter handles the length cap. One merged send beats firing
+            # alert and summary concurrently: same single round-trip, but
+            # ordering is guaranteed and it costs one message against the
+            # per-chat flood budget instead of two
+            segments = [
+                self.wallet_formatter.get_quick_alert_message(connection_analysis),
+                self.wallet_formatter.format_analysis_summary(connection_analysis)
+            ]
+
+            if connection_analysis.get('clusters'):
+                segments.append(self._format_cluster_details(
+                    connection_analysis['clusters'],
                     analysis_data['holders_analysis']
-                )
-                summary_message += f"\n{cluster_message}"
+                ))
 
-            # Format and send significant patterns
-            if analysis_data['connection_analysis'].get('patterns'):
-                pattern_message = self._format_significant_patterns(
-                    analysis_data['connection_analysis']['patterns']
-                )
-                summary_message += f"\n{pattern_message}"
+            if connection_analysis.get('patterns'):
+                segments.append(self._format_significant_patterns(
+                    connection_analysis['patterns']
+                ))
 
-            # Send the complete analysis
             await self.analyzer_queue.split_and_send_message(
                 chat_id=query.message.chat_id,
-                text=summary_message,
+                text="\n".join(filter(None, segments)),
                 parse_mode='Markdown'
             )
 
@@ -268,72 +328,70 @@ class ViewHandler:
         """Format cluster details with balance information"""
         if not clusters:
             return ""
-            
-        message = "\n👥 *Connected Wallet Groups*\n"
+
+        # One pass over holders up front; the old per-address linear scan was
+        # O(clusters x cluster_size x holders). Cluster addresses come out
+        # of the analyzer lowercased while holders_analysis keeps the
+        # checksummed casing for display, so the join is keyed lowercase
+        holders_by_addr = {h['address'].lower(): h for h in holders_data}
+
+        # Accumulate parts and join once; repeated += reallocates the whole
+        # string on each branch
+        parts = [_GROUP_HEADER]
         for idx, cluster in enumerate(clusters[:3], 1):
             if len(cluster) > 1:
                 total_balance = 0
-                message += f"\n*Group #{idx}* ({len(cluster)} wallets)\n"
-                
+                parts.append(f"\n*Group #{idx}* ({len(cluster)} wallets)\n")
+
                 # Show top 3 wallets by balance
                 shown_wallets = []
                 for address in cluster:
-                    holder = next((h for h in holders_data if h['address'] == address), None)
-                    if holder and holder['address_type'] not in ['Contract', 'Developer']:
+                    holder = holders_by_addr.get(address)
+                    if holder and holder['address_type'] not in _EXCLUDED_ADDRESS_TYPES:
                         shown_wallets.append((address, holder['balance_percentage']))
                         total_balance += holder['balance_percentage']
-                
-                # Sort by balance
-                shown_wallets.sort(key=lambda x: x[1], reverse=True)
-                
-                # Show top 3 wallets
-                for addr, balance in shown_wallets[:3]:
-                    message += f"• `{addr[:6]}...{addr[-4:]}` ({balance:.2f}%)\n"
-                
+
+                # Show top 3 wallets; nlargest avoids sorting the whole list
+                for addr, balance in heapq.nlargest(3, shown_wallets, key=lambda x: x[1]):
+                    parts.append(f"• `{_short_addr(addr)}` ({balance:.2f}%)\n")
+
                 if len(shown_wallets) > 3:
-                    message += f"  _...and {len(shown_wallets)-3} more wallets_\n"
-                    
-                message += f"📊 Group total: {total_balance:.2f}%\n"
-        
+                    parts.append(f"  _...and {len(shown_wallets)-3} more wallets_\n")
+
+                parts.append(f"📊 Group total: {total_balance:.2f}%\n")
+
         if len(clusters) > 3:
-            message += f"\n_...and {len(clusters)-3} more groups_"
-            
-        return message
+            parts.append(f"\n_...and {len(clusters)-3} more groups_")
+
+        return "".join(parts)
 
     def _format_significant_patterns(self, patterns):
         """Format significant pattern findings"""
         if not patterns:
             return ""
             
-        message = "\n🔍 *Significant Patterns*\n"
-        
-        # Filter and sort patterns by significance
-        significant_patterns = [p for p in patterns if p.get('significance', 0) > 0.7]
-        significant_patterns.sort(key=lambda x: x.get('significance', 0), reverse=True)
-        
-        for pattern in significant_patterns[:3]:
+        parts = [_PATTERN_HEADER]
+
+        # Only the top three are shown, so select them with nlargest instead
+        # of sorting the whole filtered list
+        significant_patterns = [p for p in patterns if p.get('significance', 0) > SIG_THRESHOLD]
+        top_patterns = heapq.nlargest(3, significant_patterns, key=lambda p: p.get('significance', 0))
+
+        for pattern in top_patterns:
             pattern_type = pattern.get('type', 'unknown')
             if pattern_type == 'creation':
-                message += (
-                    f"• 🕒 Coordinated creation detected\n"
-                    f"  {pattern.get('details', 'No details available')}\n"
-                )
+                parts.append(f"{_CREATION_PATTERN_PREFIX}{pattern.get('details', 'No details available')}\n")
             elif pattern_type == 'transaction':
-                message += (
-                    f"• 💸 Related transaction pattern\n"
-                    f"  {pattern.get('details', 'No details available')}\n"
-                )
-                
+                parts.append(f"{_TX_PATTERN_PREFIX}{pattern.get('details', 'No details available')}\n")
+
         if len(significant_patterns) > 3:
-            message += f"\n_...and {len(significant_patterns)-3} more patterns_"
-            
-        return message
+            parts.append(f"\n_...and {len(significant_patterns)-3} more patterns_")
+
+        return "".join(parts)
 
     def _validate_analysis_data(self, analysis_data, required_section):
-        """Validate analysis data and required section existence"""
-        if not analysis_data:
-            raise ValueError("Analysis data not found")
-        if required_section not in analysis_data:
+        """Return the section payload, raising if it is missing or empty"""
+        value = analysis_data.get(required_section) if analysis_data else None
+        if not value:
             raise ValueError(f"{required_section} data not found")
-        if not analysis_data[required_section]:
-            raise ValueError(f"{required_section} data is empty")
\ No newline at end of file
+        return value
\ No newline at end of file
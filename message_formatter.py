@@ -1,104 +1,313 @@
-from typing import Dict, List, Tuple
+import bisect
+import time
+import types
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
 from datetime import datetime, timezone
 
+# Emoji/template constants hoisted to module scope so the per-holder loop
+# never rebuilds dict or template literals
+_TYPE_EMOJI = {
+    "Contract": "📜",
+    "Developer": "👨‍💻",
+    "User": "👤",
+    "Fresh Wallet": "🆕",
+    "Bot": "🤖",
+    "Likely Bot": "⚠️",
+    "OG": "👑",
+    "Blackhole": "🔥"
+}
+
+_CATEGORY_EMOJI = {
+    "Contract": "📜",
+    "Fresh Wallet": "🆕",
+    "Bot": "🤖",
+    "Likely Bot": "⚠️",
+    "OG": "👑",
+}
+
+_HOLDER_ENTRY_TMPL = (
+    "{idx}. {emoji} `{short_addr}`\n"
+    "   💰 Balance: `{balance}` ({pct:.4f}%)\n"
+    "   ⏳ Age: {age} days\n"
+    "   🎨 NFTs: {nfts}\n"
+    "   📈 Activity: {activity} ({tx} tx/30d)\n"
+    "   🏷️ Tags: {tags}\n"
+    "➖➖➖➖➖➖➖➖➖➖\n"
+)
+
+_DEV_ENTRY_TMPL = (
+    "{idx}. {emoji} `{short_addr}` 👨‍💻\n"
+    "   💰 Balance: `{balance}` ({pct:.4f}%)\n"
+    "   ⏳ Age: {age} days\n"
+    "   🎨 NFTs: {nfts}\n"
+    "   📈 Activity: {activity} ({tx} tx/30d)\n"
+    "   🏷️ Tags: {tags}\n"
+    "   💼 ETH History: {eth_history} tx\n"
+    "➖➖➖➖➖➖➖➖➖➖\n"
+)
+
+# Risk ladders as data: thresholds ascending, outcomes[i] applies once i
+# thresholds are crossed. _apply_ladder picks the band with one bisect
+# instead of an if/elif chain, and the rule set stays auditable in one place.
+_OG_THRESHOLDS = (10, 25, 35)
+_OG_OUTCOMES = (
+    (0, None),
+    (-5, "✅ Some OG holder presence ({:.1f}%)"),
+    (-15, "✅ Solid OG holder base ({:.1f}%)"),
+    (-25, "✅ Strong OG holder base ({:.1f}%)"),
+)
+
+_TOP_HOLDER_THRESHOLDS = (15, 30, 50)
+_TOP_HOLDER_OUTCOMES = (
+    (0, None),
+    (10, "⚠️ Moderate: Single wallet holds >15% supply"),
+    (20, "⚠️ High: Single wallet holds >30% supply"),
+    (30, "❌ Critical: Single wallet holds >50% supply"),
+)
+
+_FRESH_THRESHOLDS = (5, 8)
+_FRESH_OUTCOMES = (
+    (0, None),
+    (10, "⚠️ Notable number of fresh wallets (<7 days)"),
+    (15, "🆕 High number of fresh wallets (<7 days)"),
+)
+
+_LIKELY_BOT_THRESHOLDS = (5, 8)
+_LIKELY_BOT_OUTCOMES = (
+    (0, None),
+    (10, "⚠️ Notable number of likely bot wallets detected"),
+    (15, "⚠️ High number of likely bot wallets detected"),
+)
+
+_RISK_LEVEL_THRESHOLDS = (15, 30, 50, 75)
+_RISK_LEVELS = (
+    "✅ Very Low Risk",
+    "🟢 Low Risk",
+    "🟡 Medium Risk",
+    "🟠 High Risk",
+    "🔴 Very High Risk",
+)
+
+def _risk_level(score) -> str:
+    """Map a 0-100 risk score onto its display label"""
+    return _RISK_LEVELS[bisect.bisect_right(_RISK_LEVEL_THRESHOLDS, score)]
+
+# Connection-analysis total-risk bands (different labels and scale)
+_CONN_THRESHOLDS = (2, 4, 6)
+_CONN_LEVELS = (
+    "🟢 Low Risk",
+    "🟡 Medium Risk",
+    "🟠 Moderate Risk",
+    "🔴 High Risk",
+)
+
+# Connection-analysis ladders (delta only, no message)
+_NUM_CLUSTERS_THRESHOLDS = (1, 2, 3)
+_NUM_CLUSTERS_DELTAS = (0, 2, 3, 4)
+_CLUSTER_SIZE_THRESHOLDS = (1, 3, 5)
+_CLUSTER_SIZE_DELTAS = (0, 2, 3, 4)
+_DENSITY_THRESHOLDS = (0.005, 0.01, 0.05)
+_DENSITY_DELTAS = (0, 2, 3, 4)
+_NUM_PATTERNS_THRESHOLDS = (1, 3, 5)
+_NUM_PATTERNS_DELTAS = (0, 3, 4, 5)
+_TIME_GAP_THRESHOLDS = (0.5, 2, 6)  # hours; lower gap = higher risk
+_TIME_GAP_DELTAS = (5, 4, 3, 0)
+
+# Holder tag combinations as bit flags. Only a few dozen combinations ever
+# occur, so the joined display string is built once per combination and
+# served from _TAGS_CACHE afterwards — no per-holder list + join
+_FRESH, _BOT, _LIKELY, _OG, _CONTRACT = 1, 2, 4, 8, 16
+_BLACKHOLE, _DEV, _NEWDEV, _HIGHDEV = 32, 64, 128, 256
+
+_FLAG_LABELS = (
+    (_BLACKHOLE, "🔥 Burn Address"),
+    (_DEV, "👨‍💻 Token Developer"),
+    (_NEWDEV, "⚠️ New Dev"),
+    (_HIGHDEV, "⚠️ High Dev Holdings"),
+    (_FRESH, "🆕 Fresh Wallet"),
+    (_BOT, "🤖 Bot"),
+    (_LIKELY, "⚠️ Likely Bot"),
+    (_OG, "👑 OG"),
+    (_CONTRACT, "📜 Contract"),
+)
+
+_TAGS_CACHE: Dict[int, str] = {0: "Normal"}
+
+def _build_tags(flags: int) -> str:
+    return " | ".join(label for bit, label in _FLAG_LABELS if flags & bit)
+
+# Shared immutable fallback for partially populated holder records; lets
+# the formatters degrade a bad entry to defaults instead of losing the
+# whole message to a KeyError
+_EMPTY = types.MappingProxyType({})
+
+# One-second memo for the UTC header timestamp; messages rendered within
+# the same second share the string and skip strftime entirely
+_utc_memo = (0, "")
+
+def _utc_now_str() -> str:
+    """Current UTC time as 'YYYY-MM-DD HH:MM:SS' without deprecated utcnow()"""
+    global _utc_memo
+    now = int(time.time())
+    if now != _utc_memo[0]:
+        tm = time.gmtime(now)
+        _utc_memo = (now, "%04d-%02d-%02d %02d:%02d:%02d" % (
+            tm.tm_year, tm.tm_mon, tm.tm_mday, tm.tm_hour, tm.tm_min, tm.tm_sec))
+    return _utc_memo[1]
+
+@lru_cache(maxsize=4096)
+def _short_addr(addr: str) -> str:
+    """Truncated `0x1234...abcd` display form; memoized since the same
+    addresses recur across cached and refreshed messages"""
+    return f"{addr[:6]}...{addr[-4:]}"
+
+def _apply_ladder(value, thresholds, outcomes, strict=False):
+    """Pick the outcome for the highest band value reaches.
+
+    strict=True gives 'value > threshold' semantics, the default gives
+    'value >= threshold'.
+    """
+    if strict:
+        return outcomes[bisect.bisect_left(thresholds, value)]
+    return outcomes[bisect.bisect_right(thresholds, value)]
+
 class MessageFormatter:
     @staticmethod
-    def format_holders_table(holders_data: List[Dict]) -> str:
-        """Format holders data as a telegram-friendly table with emojis and tags"""
+    def _table_header(holders_data: List[Dict]) -> str:
+        """Shared header line for holders-table messages"""
         current_time = datetime.now(timezone.utc)
-        analysis_time = datetime.strptime(holders_data[0].get('analysis_time', current_time.strftime('%Y-%m-%d %H:%M:%S')), '%Y-%m-%d %H:%M:%S')
-        analysis_time = analysis_time.replace(tzinfo=timezone.utc)
-        
+        # fromisoformat is C-accelerated and accepts the stored
+        # 'YYYY-MM-DD HH:MM:SS' form; strptime interprets the format string
+        # in Python on every call
+        raw_time = holders_data[0].get('analysis_time')
+        if raw_time:
+            analysis_time = datetime.fromisoformat(raw_time).replace(tzinfo=timezone.utc)
+        else:
+            analysis_time = current_time
+
         time_diff = current_time - analysis_time
         data_freshness = "🟢 Real-time" if time_diff.seconds < 300 else "🟡 Recent" if time_diff.seconds < 3600 else "🔴 Delayed"
-        
-        message = "📊 *Top Holders Analysis*\n"
-        message += f"🕒 Analysis Time: {analysis_time.strftime('%Y-%m-%d %H:%M:%S')} UTC ({data_freshness})\n\n"
-        
+
+        return (
+            "📊 *Top Holders Analysis*\n"
+            f"🕒 Analysis Time: {analysis_time.strftime('%Y-%m-%d %H:%M:%S')} UTC ({data_freshness})\n\n"
+        )
+
+    @staticmethod
+    def _iter_entries(holders_data: List[Dict]) -> Iterator[str]:
+        """Yield one formatted table entry per holder"""
         for idx, holder in enumerate(holders_data, 1):
-            # Determine holder type and tags
-            type_emoji = {
-                "Contract": "📜",
-                "Developer": "👨‍💻",
-                "User": "👤",
-                "Fresh Wallet": "🆕",
-                "Bot": "🤖",
-                "Likely Bot": "⚠️",
-                "OG": "👑",
-                "Blackhole": "🔥"
-            }.get(holder["address_type"], "👤")
-            
-            # Determine tags
-            tags = []
-            age_days = holder['age_info']['wallet_age_days']
-            tx_count = holder['activity_info']['total_recent_tx_count']
-            
-            if holder['address_type'] == 'Blackhole':
-                tags = ["🔥 Burn Address"]
-            elif holder['address_type'] == 'Developer':
-                tags = ["👨‍💻 Token Developer"]
+            # Unpack the nested fields once; the tag logic and the entry
+            # context below read several of them repeatedly. .get with
+            # defaults keeps one partial upstream record from aborting the
+            # whole table
+            atype = holder.get('address_type', 'User')
+            activity_info = holder.get('activity_info') or _EMPTY
+            nft_info = holder.get('nft_info') or _EMPTY
+            age_days = (holder.get('age_info') or _EMPTY).get('wallet_age_days', 0)
+            tx_count = activity_info.get('total_recent_tx_count', 0)
+            balance_pct = holder.get('balance_percentage', 0.0)
+            eth_nfts = nft_info.get('eth_nfts') or []
+            base_nfts = nft_info.get('base_nfts') or []
+            address = holder.get('address', '')
+
+            # Determine tags as bit flags; the display string comes from
+            # the combination cache
+            flags = 0
+            if atype == 'Blackhole':
+                flags = _BLACKHOLE
+            elif atype == 'Developer':
+                flags = _DEV
                 if age_days < 30:
-                    tags.append("⚠️ New Dev")
-                if holder['balance_percentage'] > 20:
-                    tags.append("⚠️ High Dev Holdings")
+                    flags |= _NEWDEV
+                if balance_pct > 20:
+                    flags |= _HIGHDEV
             else:
                 if age_days < 7:
-                    tags.append("🆕 Fresh Wallet")
+                    flags |= _FRESH
                 if tx_count > 1500:
-                    tags.append("🤖 Bot")
+                    flags |= _BOT
                 elif tx_count > 750:
-                    tags.append("⚠️ Likely Bot")
-                elif age_days > 360 and holder['nft_info']['eth_nfts']:
-                    tags.append("👑 OG")
-                elif holder['address_type'] == 'Contract':
-                    tags.append("📜 Contract")
-            
-            tags_str = " | ".join(tags) if tags else "Normal"
-            
-            # Determine activity status
-            activity = "✅" if holder["activity_info"]["is_active_overall"] else "❌"
-            
+                    flags |= _LIKELY
+                elif age_days > 360 and eth_nfts:
+                    flags |= _OG
+                elif atype == 'Contract':
+                    flags |= _CONTRACT
+            tags_str = _TAGS_CACHE.get(flags)
+            if tags_str is None:
+                tags_str = _TAGS_CACHE[flags] = _build_tags(flags)
+
             # Format NFT status
             nft_status = []
-            if holder["nft_info"]["base_nfts"]:
+            if base_nfts:
                 nft_status.append("Base✅")
-            if holder["nft_info"]["eth_nfts"]:
+            if eth_nfts:
                 nft_status.append("ETH✅")
-            nft_str = " ".join(nft_status) if nft_status else "❌"
-            
+
             # Update balance formatting to show smaller amounts
-            balance = holder['token_balance']
+            balance = holder.get('token_balance', 0.0)
             balance_str = (
                 f"{balance:.8f}" if balance < 0.01 else  # Show 8 decimals for very small amounts
                 f"{balance:.4f}" if balance < 1 else     # Show 4 decimals for small amounts
                 f"{balance:.2f}"                         # Show 2 decimals for larger amounts
             )
-            
-            # Create holder entry with special formatting for Developer
-            if holder['address_type'] == 'Developer':
-                entry = (
-                    f"{idx}. {type_emoji} `{holder['address'][:6]}...{holder['address'][-4:]}` 👨‍💻\n"
-                    f"   💰 Balance: `{balance_str}` ({holder['balance_percentage']:.4f}%)\n"
-                    f"   ⏳ Age: {holder['age_info']['wallet_age_days']} days\n"
-                    f"   🎨 NFTs: {nft_str}\n"
-                    f"   📈 Activity: {activity} ({tx_count} tx/30d)\n"
-                    f"   🏷️ Tags: {tags_str}\n"
-                    f"   💼 ETH History: {holder['activity_info']['ethereum']['total_tx_display']} tx\n"
-                    "➖➖➖➖➖➖➖➖➖➖\n"
-                )
+
+            ctx = {
+                'idx': idx,
+                'emoji': _TYPE_EMOJI.get(atype, "👤"),
+                'short_addr': _short_addr(address),
+                'balance': balance_str,
+                'pct': balance_pct,
+                'age': age_days,
+                'nfts': " ".join(nft_status) if nft_status else "❌",
+                'activity': "✅" if activity_info.get("is_active_overall") else "❌",
+                'tx': tx_count,
+                'tags': tags_str
+            }
+
+            # Developer entries carry the extra ETH history line
+            if atype == 'Developer':
+                eth = activity_info.get('ethereum') or _EMPTY
+                ctx['eth_history'] = eth.get('total_tx_display', 0)
+                yield _DEV_ENTRY_TMPL.format_map(ctx)
             else:
-                entry = (
-                    f"{idx}. {type_emoji} `{holder['address'][:6]}...{holder['address'][-4:]}`\n"
-                    f"   💰 Balance: `{balance_str}` ({holder['balance_percentage']:.4f}%)\n"
-                    f"   ⏳ Age: {holder['age_info']['wallet_age_days']} days\n"
-                    f"   🎨 NFTs: {nft_str}\n"
-                    f"   📈 Activity: {activity} ({tx_count} tx/30d)\n"
-                    f"   🏷️ Tags: {tags_str}\n"
-                    "➖➖➖➖➖➖➖➖➖➖\n"
-                )
-            message += entry
-        
-        return message
+                yield _HOLDER_ENTRY_TMPL.format_map(ctx)
+
+    @staticmethod
+    def format_holders_table(holders_data: List[Dict]) -> str:
+        """Format holders data as a telegram-friendly table with emojis and tags"""
+        header = MessageFormatter._table_header(holders_data)
+        return header + "".join(MessageFormatter._iter_entries(holders_data))
+
+    # Telegram caps messages at 4096 chars; leave headroom for the repeated
+    # header and Markdown expansion
+    _CHUNK_LIMIT = 3800
+
+    @staticmethod
+    def format_holders_messages(holders_data: List[Dict]) -> List[str]:
+        """Pack the holders table into a list of sendable-size messages.
+
+        Entries stream from _iter_entries and are flushed whenever the next
+        one would push the current chunk past the Telegram limit, so no
+        monolithic 50-holder string is ever built. Each chunk repeats the
+        header for standalone readability.
+        """
+        header = MessageFormatter._table_header(holders_data)
+        messages: List[str] = []
+        current = [header]
+        size = len(header)
+
+        for entry in MessageFormatter._iter_entries(holders_data):
+            if size + len(entry) > MessageFormatter._CHUNK_LIMIT and len(current) > 1:
+                messages.append("".join(current))
+                current = [header]
+                size = len(header)
+            current.append(entry)
+            size += len(entry)
+
+        messages.append("".join(current))
+        return messages
 
     @staticmethod
     def calculate_risk_score(analysis_data: Dict) -> Tuple[int, List[str], str]:
@@ -107,47 +316,91 @@ class MessageFormatter:
         risk_factors = []
         holders = analysis_data['holders_analysis']
 
+        # One fused pass collects every counter the rules below need; the
+        # previous version walked the holders list about a dozen times with
+        # separate generator expressions
+        og_holders = 0
+        top_10_ogs = 0
+        top_5_holders_percent = 0.0
+        top_10_holders_percent = 0.0
+        fresh_wallets = 0
+        new_wallets = 0
+        top_10_fresh = 0
+        bot_wallets = 0
+        likely_bot_wallets = 0
+        low_eth_activity = 0
+        contract_holders = 0
+        large_contract_holders = 0
+        inactive_large_holders = 0
+        ages = []
+
+        for i, h in enumerate(holders):
+            act = h.get('activity_info') or _EMPTY
+            age = (h.get('age_info') or _EMPTY).get('wallet_age_days', 0)
+            tx = act.get('total_recent_tx_count', 0)
+            bp = h.get('balance_percentage', 0.0)
+            is_og = age > 360 and (h.get('nft_info') or _EMPTY).get('eth_nfts')
+
+            if is_og:
+                og_holders += 1
+            if age < 7:
+                fresh_wallets += 1
+            if age < 30:
+                new_wallets += 1
+            if tx > 9999:
+                bot_wallets += 1
+            elif tx > 1000:
+                likely_bot_wallets += 1
+            if h.get('address_type') == 'Contract':
+                contract_holders += 1
+                if bp > 5:
+                    large_contract_holders += 1
+
+            if i < 5:
+                top_5_holders_percent += bp
+            if i < 10:
+                top_10_holders_percent += bp
+                if is_og:
+                    top_10_ogs += 1
+                if age < 7:
+                    top_10_fresh += 1
+            if i < 20:
+                if (act.get('ethereum') or _EMPTY).get('total_tx_count', 0) < 10 and bp > 2:
+                    low_eth_activity += 1
+                if not act.get('is_active_overall') and bp > 2:
+                    inactive_large_holders += 1
+
+            ages.append(age)
+
+        # Similar-age detection over sorted ages: wallets created within two
+        # days of each other are adjacent after sorting, so one linear sweep
+        # finds every close pair regardless of holder-list ordering. The old
+        # list-order adjacency check missed pairs separated by other holders.
+        ages.sort()
+        similar_age_pattern = sum(1 for a, b in zip(ages, ages[1:]) if b - a < 2)
+
         # 1. OG Holder Analysis
-        og_holders = sum(1 for h in holders if h['age_info']['wallet_age_days'] > 360 and h['nft_info']['eth_nfts'])
         og_percentage = (og_holders / len(holders)) * 100
-        
-        # Fix the OG percentage thresholds and messaging
-        if og_percentage >= 35:
-            risk_score -= 25
-            risk_factors.append(f"✅ Strong OG holder base ({og_percentage:.1f}%)")
-        elif og_percentage >= 25:
-            risk_score -= 15
-            risk_factors.append(f"✅ Solid OG holder base ({og_percentage:.1f}%)")
-        elif og_percentage >= 10:
-            risk_score -= 5
-            risk_factors.append(f"✅ Some OG holder presence ({og_percentage:.1f}%)")
-        # Remove any OG-related risk factors if percentage is too low
-        if og_percentage < 10:
-            risk_factors = [f for f in risk_factors if "OG holder" not in f]
+
+        delta, msg = _apply_ladder(og_percentage, _OG_THRESHOLDS, _OG_OUTCOMES)
+        if msg:
+            risk_score += delta
+            risk_factors.append(msg.format(og_percentage))
 
         # Check OG presence in top holders
-        top_10_ogs = sum(1 for h in holders[:10] 
-                        if h['age_info']['wallet_age_days'] > 360 
-                        and h['nft_info']['eth_nfts'])
         if top_10_ogs >= 6:
             risk_score -= 15
             risk_factors.append("✅ Strong OG presence in top holders")
 
         # 2. Concentration Risk Analysis
-        top_holder_percent = holders[0]['balance_percentage']
-        top_5_holders_percent = sum(h['balance_percentage'] for h in holders[:5])
-        top_10_holders_percent = sum(h['balance_percentage'] for h in holders[:10])
-        
+        top_holder_percent = holders[0].get('balance_percentage', 0.0)
+
         # Single wallet concentration
-        if top_holder_percent > 50:
-            risk_score += 30
-            risk_factors.append("❌ Critical: Single wallet holds >50% supply")
-        elif top_holder_percent > 30:
-            risk_score += 20
-            risk_factors.append("⚠️ High: Single wallet holds >30% supply")
-        elif top_holder_percent > 15:
-            risk_score += 10
-            risk_factors.append("⚠️ Moderate: Single wallet holds >15% supply")
+        delta, msg = _apply_ladder(top_holder_percent, _TOP_HOLDER_THRESHOLDS,
+                                   _TOP_HOLDER_OUTCOMES, strict=True)
+        if msg:
+            risk_score += delta
+            risk_factors.append(msg)
 
         # Group concentration
         if top_5_holders_percent > 80:
@@ -158,16 +411,10 @@ class MessageFormatter:
             risk_factors.append("⚠️ Top 10 wallets control >90% supply")
 
         # 3. Holder Age Analysis
-        fresh_wallets = sum(1 for h in holders if h['age_info']['wallet_age_days'] < 7)
-        new_wallets = sum(1 for h in holders if h['age_info']['wallet_age_days'] < 30)
-        top_10_fresh = sum(1 for h in holders[:10] if h['age_info']['wallet_age_days'] < 7)
-        
-        if fresh_wallets >= 8:
-            risk_score += 15
-            risk_factors.append("🆕 High number of fresh wallets (<7 days)")
-        elif fresh_wallets >= 5:
-            risk_score += 10
-            risk_factors.append("⚠️ Notable number of fresh wallets (<7 days)")
+        delta, msg = _apply_ladder(fresh_wallets, _FRESH_THRESHOLDS, _FRESH_OUTCOMES)
+        if msg:
+            risk_score += delta
+            risk_factors.append(msg)
         
         if new_wallets >= 8:
             risk_score += 10
@@ -178,35 +425,22 @@ class MessageFormatter:
             risk_factors.append("❌ Multiple top 10 holders are fresh wallets")
 
         # 4. Bot Activity Analysis
-        bot_wallets = sum(1 for h in holders if h['activity_info']['total_recent_tx_count'] > 9999)
-        likely_bot_wallets = sum(1 for h in holders if 1000 < h['activity_info']['total_recent_tx_count'] <= 9999)
-        
-        if likely_bot_wallets >= 8:
-            risk_score += 15
-            risk_factors.append("⚠️ High number of likely bot wallets detected")
-        elif likely_bot_wallets >= 5:
-            risk_score += 10
-            risk_factors.append("⚠️ Notable number of likely bot wallets detected")
+        delta, msg = _apply_ladder(likely_bot_wallets, _LIKELY_BOT_THRESHOLDS,
+                                   _LIKELY_BOT_OUTCOMES)
+        if msg:
+            risk_score += delta
+            risk_factors.append(msg)
         
         if bot_wallets >= 5:
             risk_score += 15
             risk_factors.append("🤖 High number of bot wallets detected")
 
         # 5. Wallet Pattern Analysis
-        similar_age_pattern = 0
-        for i in range(len(holders) - 1):
-            if abs(holders[i]['age_info']['wallet_age_days'] - holders[i+1]['age_info']['wallet_age_days']) < 2:
-                similar_age_pattern += 1
-        
         if similar_age_pattern > 10:
             risk_score += 15
             risk_factors.append("⚠️ Suspicious pattern: Multiple wallets created at similar times")
 
         # 6. Cross-chain Activity
-        low_eth_activity = sum(1 for h in holders[:20] 
-                            if h['activity_info']['ethereum']['total_tx_count'] < 10 
-                            and h['balance_percentage'] > 2)
-        
         if low_eth_activity > 10:
             risk_score += 10
             risk_factors.append("⚠️ Many large holders have limited Ethereum activity")
@@ -237,11 +471,6 @@ class MessageFormatter:
                 risk_factors.append("⚠️ Developer shows limited blockchain experience")
 
         # 8. Contract Holder Analysis
-        contract_holders = sum(1 for h in holders if h['address_type'] == 'Contract')
-        large_contract_holders = sum(1 for h in holders 
-                                if h['address_type'] == 'Contract' 
-                                and h['balance_percentage'] > 5)
-        
         if large_contract_holders > 3:
             risk_score += 15
             risk_factors.append("⚠️ Multiple large contract holders detected")
@@ -250,10 +479,6 @@ class MessageFormatter:
             risk_factors.append("ℹ️ High number of contract holders")
 
         # 9. Activity Distribution
-        inactive_large_holders = sum(1 for h in holders[:20] 
-                                if not h['activity_info']['is_active_overall'] 
-                                and h['balance_percentage'] > 2)
-        
         if inactive_large_holders > 5:
             risk_score += 10
             risk_factors.append("⚠️ Multiple large holders are inactive")
@@ -262,56 +487,50 @@ class MessageFormatter:
         risk_score = max(0, min(risk_score, 100))
 
         # Determine risk level
-        if risk_score >= 75:
-            risk_level = "🔴 Very High Risk"
-        elif risk_score >= 50:
-            risk_level = "🟠 High Risk"
-        elif risk_score >= 30:
-            risk_level = "🟡 Medium Risk"
-        elif risk_score >= 15:
-            risk_level = "🟢 Low Risk"
-        else:
-            risk_level = "✅ Very Low Risk"
+        risk_level = _risk_level(risk_score)
 
         return risk_score, risk_factors, risk_level
 
     @staticmethod
-    def format_analysis_summary(summary_stats: Dict, analysis_data: Dict) -> str:
-        """Format analysis summary with risk score"""
+    def format_analysis_summary(summary_stats: Dict, analysis_data: Dict, now_str: str = None) -> str:
+        """Format analysis summary with risk score.
+
+        Callers formatting several sections in one batch can pass a shared
+        now_str to avoid re-running strftime per section.
+        """
         risk_score, risk_factors, risk_level = MessageFormatter.calculate_risk_score(analysis_data)
-        
-        message = (
+        now_str = now_str or _utc_now_str()
+
+        parts = [
             "📊 *Token Analysis Summary*\n"
-            f"🕒 Analysis Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC\n\n"
+            f"🕒 Analysis Time: {now_str} UTC\n\n"
             f"👥 Total Wallets: {summary_stats['Total Wallets Analyzed']}\n"
             f"💹 Supply Coverage: {summary_stats['Total Supply Coverage']}\n"
             f"⏳ Average Wallet Age: {summary_stats['Average Wallet Age']:.1f} days\n\n"
             "*Holder Categories:*\n"
+        ]
+
+        total_wallets = summary_stats['Total Wallets Analyzed']
+        parts.extend(
+            f"{_CATEGORY_EMOJI.get(category, '👤')} {category}: "
+            f"{count} ({count * 100 / total_wallets:.1f}%)\n"
+            for category, count in summary_stats['Category Distribution'].items()
+            if category
         )
-        
-        for category, count in summary_stats['Category Distribution'].items():
-            if category:
-                emoji = {
-                    "Contract": "📜",
-                    "Fresh Wallet": "🆕",
-                    "Bot": "🤖",
-                    "Likely Bot": "⚠️",
-                    "OG": "👑",
-                }.get(category, "👤")
-                percentage = (count / summary_stats['Total Wallets Analyzed']) * 100
-                message += f"{emoji} {category}: {count} ({percentage:.1f}%)\n"
-        
-        message += f"\n🎯 *Risk Assessment*\n"
-        message += f"Risk Level: {risk_level}\n"
-        message += f"Risk Score: {risk_score}/100\n\n"
-        
+
+        parts.append(
+            f"\n🎯 *Risk Assessment*\n"
+            f"Risk Level: {risk_level}\n"
+            f"Risk Score: {risk_score}/100\n\n"
+        )
+
         if risk_factors:
-            message += "*Risk Factors:*\n"
-            message += "\n".join(risk_factors)
+            parts.append("*Risk Factors:*\n")
+            parts.append("\n".join(risk_factors))
         else:
-            message += "✅ No major risk factors detected"
-        
-        return message
+            parts.append("✅ No major risk factors detected")
+
+        return "".join(parts)
 
     def format_connection_analysis(self, connection_data: Dict) -> str:
         """Format wallet connection analysis results with improved risk assessment"""
@@ -319,103 +538,90 @@ class MessageFormatter:
             if not connection_data:
                 return "❌ No connection analysis data available"
 
-            # Initialize base risk metrics with higher weights
-            cluster_risk = 0
-            creation_risk = 0
-            
-            # Calculate cluster-based risk with increased sensitivity
-            if connection_data['risk_score']['num_clusters'] > 3:  # Lowered threshold
-                cluster_risk = 4  # Increased risk score
-            elif connection_data['risk_score']['num_clusters'] > 2:
-                cluster_risk = 3
-            elif connection_data['risk_score']['num_clusters'] > 1:
-                cluster_risk = 2
-                
-            # Increased risk for connected wallets
-            if connection_data['risk_score']['largest_cluster_size'] > 5:
-                cluster_risk += 4
-            elif connection_data['risk_score']['largest_cluster_size'] > 3:
-                cluster_risk += 3
-            elif connection_data['risk_score']['largest_cluster_size'] > 1:
-                cluster_risk += 2
-                
-            # More sensitive network density thresholds
-            if connection_data['risk_score']['network_density'] > 0.05:
-                cluster_risk += 4
-            elif connection_data['risk_score']['network_density'] > 0.01:
-                cluster_risk += 3
-            elif connection_data['risk_score']['network_density'] > 0.005:
-                cluster_risk += 2
+            # Cluster-based risk from the three network metrics, each a
+            # table lookup over the module-level thresholds
+            metrics = connection_data['risk_score']
+            cluster_risk = _apply_ladder(metrics['num_clusters'],
+                                         _NUM_CLUSTERS_THRESHOLDS,
+                                         _NUM_CLUSTERS_DELTAS, strict=True)
+            cluster_risk += _apply_ladder(metrics['largest_cluster_size'],
+                                          _CLUSTER_SIZE_THRESHOLDS,
+                                          _CLUSTER_SIZE_DELTAS, strict=True)
+            cluster_risk += _apply_ladder(metrics['network_density'],
+                                          _DENSITY_THRESHOLDS,
+                                          _DENSITY_DELTAS, strict=True)
 
             # Calculate creation pattern risk with higher penalties
-            if connection_data.get('creation_patterns'):
-                num_patterns = len(connection_data['creation_patterns'])
-                time_diffs = [p.get('time_difference', 24) for p in connection_data['creation_patterns']]
-                avg_time_diff = sum(time_diffs) / len(time_diffs) if time_diffs else 24
-                
-                # Increased risk for multiple patterns
-                if num_patterns > 5:
-                    creation_risk += 5
-                elif num_patterns > 3:
-                    creation_risk += 4
-                elif num_patterns > 1:
-                    creation_risk += 3
-                    
-                # More aggressive risk for close creation times
-                if avg_time_diff < 0.5:  # Less than 30 minutes apart
-                    creation_risk += 5
-                elif avg_time_diff < 2:  # Less than 2 hours apart
-                    creation_risk += 4
-                elif avg_time_diff < 6:  # Less than 6 hours apart
-                    creation_risk += 3
+            # One pass over creation_patterns collects everything the
+            # sections below need: the average gap for the risk ladder, the
+            # first five <=30-minute pairs for display, and the total count
+            # of close pairs for the "...and N more" line
+            creation_risk = 0
+            creation_patterns = connection_data.get('creation_patterns') or ()
+            total_diff = 0.0
+            close_patterns = []
+            close_total = 0
+            for p in creation_patterns:
+                total_diff += p.get('time_difference', 24)
+                if p.get('time_difference', float('inf')) <= 30:
+                    close_total += 1
+                    if len(close_patterns) < 5:
+                        close_patterns.append(p)
+            num_patterns = len(creation_patterns)
+            avg_time_diff = total_diff / num_patterns if num_patterns else 24
+
+            if creation_patterns:
+                creation_risk += _apply_ladder(num_patterns,
+                                               _NUM_PATTERNS_THRESHOLDS,
+                                               _NUM_PATTERNS_DELTAS, strict=True)
+                # Smaller gaps between creation times mean higher risk, so
+                # this ladder indexes by thresholds the gap stays under
+                creation_risk += _TIME_GAP_DELTAS[bisect.bisect_right(_TIME_GAP_THRESHOLDS, avg_time_diff)]
 
             # Calculate total risk with adjusted thresholds
             total_risk = cluster_risk + creation_risk
             
-            if total_risk >= 6:  # Lowered threshold for high risk
-                risk_level = "🔴 High Risk"
+            band = bisect.bisect_right(_CONN_THRESHOLDS, total_risk)
+            risk_level = _CONN_LEVELS[band]
+            if band == 3:
                 risk_score = 85 + min(15, (total_risk - 6) * 3)
-            elif total_risk >= 4:
-                risk_level = "🟠 Moderate Risk"
+            elif band == 2:
                 risk_score = 65 + ((total_risk - 4) * 10)
-            elif total_risk >= 2:
-                risk_level = "🟡 Medium Risk"
+            elif band == 1:
                 risk_score = 45 + ((total_risk - 2) * 10)
             else:
-                risk_level = "🟢 Low Risk"
                 risk_score = max(20, total_risk * 20)
 
-            message = (
+            parts = [
                 "🔗 *Wallet Connection Analysis*\n\n"
                 "📊 *Network Statistics*\n"
                 f"• Connected Groups: {connection_data['risk_score']['num_clusters']}\n"
                 f"• Wallets per Group: {connection_data['risk_score']['largest_cluster_size']}\n"
                 f"• Network Density: {connection_data['risk_score']['network_density']:.3f}\n"
-            )
+            ]
 
             # Add creation pattern summary if exists
-            if connection_data.get('creation_patterns'):
-                message += f" Suspicious Creation Patterns: {len(connection_data['creation_patterns'])}\n"
-                if time_diffs:
-                    message += f"• Average Creation Time Gap: {avg_time_diff:.1f} hours\n"
+            if creation_patterns:
+                parts.append(f" Suspicious Creation Patterns: {num_patterns}\n")
+                parts.append(f"• Average Creation Time Gap: {avg_time_diff:.1f} hours\n")
 
-            message += (
+            parts.append(
                 f"\n🎯 *Risk Assessment*\n"
                 f"• Risk Level: {risk_level}\n"
                 f"• Risk Score: {risk_score:.1f}/100\n"
             )
 
             # Add creation patterns if exist
-            if connection_data.get('creation_patterns'):
-                message += "\n*⏰ Creation Time Patterns*\n"
-                # Filter patterns for <= 30 minutes
-                close_patterns = [p for p in connection_data['creation_patterns'] 
-                                 if p.get('time_difference', float('inf')) <= 30]
-                
-                for pattern in close_patterns[:5]:
+            if creation_patterns:
+                parts.append("\n*⏰ Creation Time Patterns*\n")
+                for pattern in close_patterns:
                     addr1, addr2 = pattern['wallets']
                     minutes = pattern.get('time_difference', 0)
-                    
+
+                    # Slice each address once; the f-string below reuses them
+                    short1 = _short_addr(addr1)
+                    short2 = _short_addr(addr2)
+
                     # Format time string more precisely
                     if minutes < 1:
                         seconds = int(minutes * 60)
@@ -424,44 +630,45 @@ class MessageFormatter:
                         time_str = "1 minute"
                     else:
                         time_str = f"{int(minutes)} minutes"
-                    
-                    message += (
-                        f"• `{addr1[:6]}...{addr1[-4:]}` ↔️ "
-                        f"`{addr2[:6]}...{addr2[-4:]}`\n"
+
+                    parts.append(
+                        f"• `{short1}` ↔️ `{short2}`\n"
                         f"  Created within {time_str}\n"
                     )
                     
-                remaining = len(close_patterns) - 5
+                remaining = close_total - 5
                 if remaining > 0:
-                    message += f"_...and {remaining} more patterns within 30 minutes_\n"
+                    parts.append(f"_...and {remaining} more patterns within 30 minutes_\n")
 
             # Add clusters/groups
             if connection_data.get('clusters'):
-                message += "\n*👥 Connected Wallet Groups*\n"
+                parts.append("\n*👥 Connected Wallet Groups*\n")
                 for idx, cluster in enumerate(connection_data['clusters'], 1):
                     if len(cluster) > 1:
-                        message += (
+                        parts.append(
                             f"\n*Group #{idx}* ({len(cluster)} wallets)\n"
                             "• Addresses: "
                         )
-                        # Show first few addresses
-                        for addr in cluster[:3]:
-                            message += f"`{addr[:6]}...{addr[-4:]}` "
+                        # Show first few addresses as one joined fragment
+                        parts.append(" ".join(
+                            f"`{_short_addr(addr)}`" for addr in cluster[:3]
+                        ) + " ")
                         if len(cluster) > 3:
-                            message += f"\n  _...and {len(cluster) - 3} more_"
+                            parts.append(f"\n  _...and {len(cluster) - 3} more_")
 
-            return message
+            return "".join(parts)
 
         except Exception as e:
             logger.error(f"Error formatting connection analysis: {str(e)}")
             return "❌ Error formatting wallet connection analysis."
 
     @staticmethod
-    def format_developer_info(dev_data: Dict) -> str:
+    def format_developer_info(dev_data: Dict, now_str: str = None) -> str:
         """Format developer information with emojis"""
+        now_str = now_str or _utc_now_str()
         template = (
             "👨‍💻 *Developer Analysis*\n"
-            f"🕒 Analysis Time: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC\n\n"
+            f"🕒 Analysis Time: {now_str} UTC\n\n"
             f"📍 Address: `{dev_data['address']}`\n"
             f"💼 Type: {dev_data['address_type']}\n"
             f"💰 Token Holdings: `{dev_data['token_balance']:.4f}`\n"
@@ -0,0 +1,18 @@
+-- Atomic credit reservation: decrements credits only if the balance covers
+-- the requested amount, returning true on success. Replaces the
+-- select-then-update pattern that needed two round trips and could race.
+CREATE OR REPLACE FUNCTION reserve_credits(p_user_id BIGINT, p_amount INT)
+RETURNS BOOLEAN AS $$
+DECLARE
+    updated INT;
+BEGIN
+    UPDATE users
+    SET credits = credits - p_amount,
+        last_active = NOW()
+    WHERE user_id = p_user_id
+      AND credits >= p_amount;
+
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated > 0;
+END;
+$$ LANGUAGE plpgsql;
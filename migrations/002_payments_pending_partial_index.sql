@@ -0,0 +1,6 @@
+-- Pending-payment lookups filter on user_id + status='pending' for every
+-- buy callback. A partial index keeps the lookup O(log n) without paying
+-- for the completed/expired rows that dominate the table over time.
+CREATE INDEX IF NOT EXISTS payments_pending_user_idx
+    ON payments (user_id, created_at DESC)
+    WHERE status = 'pending';
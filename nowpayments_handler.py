@@ -1,5 +1,6 @@
 # nowpayments_handler.py
 import time
+import types
 import requests
 import logging
 import asyncio
@@ -7,6 +8,28 @@ import aiohttp
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 
+try:
+    # C-accelerated JSON for the payment-status polling path; stdlib json
+    # keeps everything working if orjson isn't installed
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # pragma: no cover
+    import json
+    _json_loads = json.loads
+    _json_dumps = lambda obj: json.dumps(obj).encode()
+
+# Package/currency tables are fixed at import; the proxy keeps them
+# immutable so concurrent handlers can't mutate shared pricing state
+_CREDIT_PACKAGES = types.MappingProxyType({
+    'basic': {'credits': 50, 'price_usd': 20},
+    'pro': {'credits': 75, 'price_usd': 30},
+    'premium': {'credits': 100, 'price_usd': 40}
+})
+
+_DEFAULT_CURRENCY = 'usdttrc20'
+_SUPPORTED_CURRENCIES = frozenset({'usdttrc20'})
+
 class NOWPaymentsHandler:
     def __init__(self, api_key: str, db_manager):
         self.api_key = api_key
@@ -14,24 +37,57 @@ class NOWPaymentsHandler:
         self.base_url = "https://api.nowpayments.io/v1"
         self.logger = logging.getLogger('TokenAnalyzer')
         
-        self.credit_packages = {
-            'basic': {'credits': 50, 'price_usd': 20},
-            'pro': {'credits': 75, 'price_usd': 30},
-            'premium': {'credits': 100, 'price_usd': 40}
-        }
-        
-        self.default_currency = 'usdttrc20'
-        self.supported_currencies = {'usdttrc20'}
+        # Kept as attributes for existing callers; both point at the shared
+        # module-level tables
+        self.credit_packages = _CREDIT_PACKAGES
+        self.default_currency = _DEFAULT_CURRENCY
+        self.supported_currencies = _SUPPORTED_CURRENCIES
+
+        # One long-lived session for all provider calls; created lazily so
+        # the constructor stays usable outside a running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+
+        # payment_id -> (timestamp, status); statuses barely change inside a
+        # few seconds, so repeated polls can share one provider call
+        self._status_cache: Dict[str, tuple] = {}
+        self._status_cache_ttl = 5.0
+        # payment_id -> Future for a poll already in flight; concurrent
+        # checks for the same payment await it instead of duplicating the call
+        self._status_inflight: Dict[str, asyncio.Future] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared ClientSession, creating it on first use.
+
+        A per-call session pays TCP + TLS setup and a DNS lookup on every
+        request; the pooled session keeps connections to the provider warm.
+        """
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            limit=20,
+                            ttl_dns_cache=300,
+                            keepalive_timeout=60
+                        ),
+                        timeout=aiohttp.ClientTimeout(total=30),
+                        headers={'x-api-key': self.api_key}
+                    )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared session on shutdown"""
+        if self._session and not self._session.closed:
+            await self._session.close()
 
     async def create_payment(self, user_id: int, package_name: str, currency: str = None) -> Optional[Dict]:
         try:
-            package = self.credit_packages[package_name]
-            currency = currency or self.default_currency
-            
-            headers = {
-                'x-api-key': self.api_key,
-                'Content-Type': 'application/json'
-            }
+            if package_name not in _CREDIT_PACKAGES:
+                return {'error': True, 'message': 'Unknown credit package'}
+
+            package = _CREDIT_PACKAGES[package_name]
+            currency = currency or _DEFAULT_CURRENCY
             
             payload = {
                 'price_amount': package['price_usd'],
@@ -40,56 +96,74 @@ class NOWPaymentsHandler:
                 'order_id': f'cred_{user_id}_{int(time.time())}'
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/payment",
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                ) as response:
-                    response_data = await response.json()
-                    
-                    if response_data.get('payment_id') and response_data.get('pay_address'):
-                        payment_data = {
-                            'user_id': user_id,
-                            'payment_id': response_data['payment_id'],
-                            'package_name': package_name,
-                            'credits': package['credits'],
-                            'amount_usd': package['price_usd'],
-                            'amount_crypto': response_data['pay_amount'],
-                            'currency': 'USDT',
-                            'status': 'pending',
-                            'pay_address': response_data['pay_address'],
-                            'network': 'TRC20',
-                            'order_id': response_data['order_id'],
-                            'expiration': response_data.get('expiration_estimate_date'),
-                            'provider_data': response_data
-                        }
-
-                        if await self.db_manager.store_payment(payment_data):
-                            return payment_data
-
-                    self.logger.error(f"Provider error: {response_data}")
-                    return {'error': True, 'message': 'Payment service unavailable'}
+            session = await self._get_session()
+            async with session.post(
+                f"{self.base_url}/payment",
+                data=_json_dumps(payload),
+                headers={'Content-Type': 'application/json'}
+            ) as response:
+                response_data = _json_loads(await response.read())
+
+                if response_data.get('payment_id') and response_data.get('pay_address'):
+                    payment_data = {
+                        'user_id': user_id,
+                        'payment_id': response_data['payment_id'],
+                        'package_name': package_name,
+                        'credits': package['credits'],
+                        'amount_usd': package['price_usd'],
+                        'amount_crypto': response_data['pay_amount'],
+                        'currency': 'USDT',
+                        'status': 'pending',
+                        'pay_address': response_data['pay_address'],
+                        'network': 'TRC20',
+                        'order_id': response_data['order_id'],
+                        'expiration': response_data.get('expiration_estimate_date'),
+                        'provider_data': response_data
+                    }
+
+                    if await self.db_manager.store_payment(payment_data):
+                        return payment_data
+
+                self.logger.error(f"Provider error: {response_data}")
+                return {'error': True, 'message': 'Payment service unavailable'}
 
         except Exception as e:
             self.logger.error(f"Payment creation error: {str(e)}")
             return {'error': True, 'message': 'Payment service error'}
 
     async def check_payment_status(self, payment_id: str) -> Optional[str]:
+        cached = self._status_cache.get(payment_id)
+        if cached and time.time() - cached[0] < self._status_cache_ttl:
+            return cached[1]
+
+        inflight = self._status_inflight.get(payment_id)
+        if inflight is not None:
+            return await inflight
+
+        future = asyncio.get_running_loop().create_future()
+        self._status_inflight[payment_id] = future
         try:
-            headers = {'x-api-key': self.api_key}
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/payment/{payment_id}",
-                    headers=headers,
-                    timeout=30
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    payment_data = await response.json()
-                    return payment_data.get('payment_status')
+            status = await self._fetch_payment_status(payment_id)
+            self._status_cache[payment_id] = (time.time(), status)
+            future.set_result(status)
+            return status
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            # Remove before waiters resume so the next poll starts fresh
+            self._status_inflight.pop(payment_id, None)
+
+    async def _fetch_payment_status(self, payment_id: str) -> Optional[str]:
+        try:
+            session = await self._get_session()
+            async with session.get(
+                f"{self.base_url}/payment/{payment_id}"
+            ) as response:
+                if response.status != 200:
+                    return None
+                payment_data = _json_loads(await response.read())
+                return payment_data.get('payment_status')
 
         except Exception as e:
             self.logger.error(f"Status check error: {str(e)}")
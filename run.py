@@ -1,53 +1,60 @@
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 
 import os
 import sys
-from telegram import Update
-from telegram.ext import (
-    Application, 
-    CommandHandler, 
-    CallbackQueryHandler, 
-    MessageHandler,
-    filters
-)
 
-from db_manager import DatabaseManager
-from message_formatter import MessageFormatter
-from handlers.menu_handler import MenuHandler
-from bot_commands import BotCommands
-from analyzer_queue import AnalyzerQueue
-from handlers import HandlerManager
-from nowpayments_handler import NOWPaymentsHandler  # Add this import
-from session_manager import SessionManager
-from file_cleaner import FileCleaner
-
-# Configure logging
+# Component and telegram imports happen lazily in init_components()/run():
+# importing this module for inspection (tests, tooling) stays cheap, and a
+# missing dependency surfaces as a clear logged error at startup instead of
+# an import-time traceback
+
+# Configure logging. Handlers emit into an unbounded queue drained by a
+# listener thread, so a log call from an async handler is a cheap enqueue
+# instead of a blocking file write+flush on the event loop.
+_log_queue: queue.Queue = queue.Queue(-1)
+# The queue handler must carry the bare message: QueueHandler.prepare()
+# runs its formatter and bakes the result into record.msg, so any prefix
+# set on the queue side (including basicConfig's default) would be
+# applied a second time by the listener's handlers
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO,
-    handlers=[
-        logging.FileHandler('token_analyzer.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[_queue_handler]
+)
+_log_handlers = (
+    logging.FileHandler('token_analyzer.log', encoding='utf-8'),
+    logging.StreamHandler(sys.stdout)
 )
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
 
 class CustomFormatter(logging.Formatter):
     def __init__(self):
         super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
     def formatException(self, exc_info):
+        # Exception payloads can carry bytes/surrogates from external
+        # libraries; scrub only here, where it can actually occur
         result = super().formatException(exc_info)
-        return str(result).encode('utf-8', 'ignore').decode('utf-8')
+        return str(result).encode('utf-8', 'replace').decode('utf-8')
 
     def format(self, record):
-        record.msg = str(record.msg).encode('utf-8', 'ignore').decode('utf-8')
+        # A str message is already valid Unicode — no encode/decode round
+        # trip needed; just coerce the rare non-str payload
+        if not isinstance(record.msg, str):
+            record.msg = str(record.msg)
         return super().format(record)
 
+# The prefix is applied exactly once, by the listener thread's real
+# handlers; the queue handler carries records with a bare message
 formatter = CustomFormatter()
-for handler in logging.root.handlers:
+for handler in _log_handlers:
     handler.setFormatter(formatter)
 
 logger = logging.getLogger('TokenAnalyzer')
@@ -66,23 +73,38 @@ class TokenAnalyzerBot:
         # Load environment variables
         env_path = Path('.') / '.env'
         load_dotenv(dotenv_path=env_path)
-        
-        self.token = os.getenv('TELEGRAM_BOT_TOKEN')
+
+        # One snapshot of the environment; components read from it instead
+        # of re-scanning os.environ per key, and required keys fail fast
+        # here with explicit names
+        self._env = dict(os.environ)
+        self.token = self._env.get('TELEGRAM_BOT_TOKEN')
         if not self.token:
             raise ValueError("No telegram bot token found!")
+        self._nowpayments_key = self._env.get('NOWPAYMENTS_API_KEY')
+        if not self._nowpayments_key:
+            raise ValueError("No NOWPayments API key found!")
 
     def init_components(self):
         """Initialize all components"""
         logger.info("Initializing components...")
         try:
+            from db_manager import DatabaseManager
+            from message_formatter import MessageFormatter
+            from handlers.menu_handler import MenuHandler
+            from bot_commands import BotCommands
+            from analyzer_queue import AnalyzerQueue
+            from handlers import HandlerManager
+            from nowpayments_handler import NOWPaymentsHandler
+            from session_manager import SessionManager
+            from file_cleaner import FileCleaner
+
             # Initialize file cleaner first
             self.file_cleaner = FileCleaner(
                 directories=['.', 'test'],
                 file_types=['.csv', '.txt'],
                 max_age_minutes=5
             )
-            self.file_cleaner.start()
-            
             self.session_manager = SessionManager()
             self.db_manager = DatabaseManager()
             self.analyzer_queue = AnalyzerQueue(self.db_manager)
@@ -93,7 +115,7 @@ class TokenAnalyzerBot:
                 session_manager=self.session_manager
             )
 
-            self.payment_handler = NOWPaymentsHandler(os.getenv('NOWPAYMENTS_API_KEY'), self.db_manager)
+            self.payment_handler = NOWPaymentsHandler(self._nowpayments_key, self.db_manager)
 
             
             # Initialize bot commands
@@ -118,10 +140,21 @@ class TokenAnalyzerBot:
             )
             
             logger.info("Components initialized successfully")
+        except ImportError as e:
+            logger.error(f"Missing dependency: {str(e)} — check the installed requirements")
+            raise
         except Exception as e:
             logger.error(f"Init error: {str(e)}")
             raise
 
+    async def _start_background_jobs(self, application):
+        """Schedule the periodic file sweep on the bot's own event loop.
+
+        Runs as an application task instead of the old scheduler thread,
+        so cleanup shares the loop with handlers and stops with the app.
+        """
+        application.create_task(self.file_cleaner.run_forever())
+
     def stop(self):
         """Cleanup method to stop all components"""
         try:
@@ -130,14 +163,45 @@ class TokenAnalyzerBot:
                 logger.info("File cleaner stopped")
         except Exception as e:
             logger.error(f"Error stopping components: {str(e)}")
+        finally:
+            # Drain remaining records and stop the listener thread last so
+            # the shutdown messages above still reach the log file
+            try:
+                _log_listener.stop()
+            except Exception:
+                pass
 
     def run(self):
         """Initialize and start the bot"""
         try:
+            from telegram import Update
+            from telegram.ext import (
+                Application,
+                AIORateLimiter,
+                CommandHandler,
+                CallbackQueryHandler,
+                MessageHandler,
+                filters
+            )
+
             self.init_components()
             
-            # Create application
-            application = Application.builder().token(self.token).build()
+            # Create application with a pool large enough for concurrent handler
+            # sends (default 1-8 exhausts immediately under callback bursts)
+            application = (
+                Application.builder()
+                .token(self.token)
+                .connection_pool_size(256)
+                .pool_timeout(30)
+                .get_updates_connection_pool_size(8)
+                .rate_limiter(AIORateLimiter(
+                    overall_max_rate=30,
+                    overall_time_period=1,
+                    max_retries=3
+                ))
+                .post_init(self._start_background_jobs)
+                .build()
+            )
             self.analyzer_queue.set_application(application)
             
             # Add handlers
@@ -155,7 +219,18 @@ class TokenAnalyzerBot:
             application.add_error_handler(self.handler_manager.error_handler.handle_error)
             
             logger.info("Bot started")
-            application.run_polling(allowed_updates=Update.ALL_TYPES)
+            # Long-polling: each getUpdates holds on Telegram's side for up
+            # to 50s instead of returning empty every few seconds, so an
+            # idle bot makes ~one HTTPS round-trip a minute and updates
+            # arrive with no poll-interval delay. Stale updates queued while
+            # the bot was down are dropped at boot.
+            application.run_polling(
+                allowed_updates=Update.ALL_TYPES,
+                timeout=50,
+                poll_interval=0.0,
+                bootstrap_retries=-1,
+                drop_pending_updates=True
+            )
             
         except Exception as e:
             logger.error(f"Fatal error: {str(e)}")
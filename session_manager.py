@@ -1,11 +1,12 @@
 # session_manager.py
 
 import time
-from typing import Dict, Optional, Any
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import logging
-from enum import Enum
+from enum import Enum, IntEnum
 
 class UserState(Enum):
     MAIN_MENU = "main_menu"
@@ -15,48 +16,87 @@ class UserState(Enum):
     VIEWING_RESULTS = "viewing_results"
     PURCHASING_CREDITS = "purchasing_credits"
 
-@dataclass
+class RateLimitAction(IntEnum):
+    """Known rate-limited actions; values index Session.rate_limits"""
+    ADDRESS_CHECK = 0
+    PAYMENT_CREATION = 1
+
+@dataclass(slots=True)
 class ViewPreferences:
     default_view: str = "summary"
     auto_refresh: bool = False
     show_detailed_stats: bool = False
 
 class Session:
+    # No per-instance __dict__: sessions are held for every active user,
+    # so the fixed slot layout trims ~100 bytes each and speeds attribute
+    # access
+    __slots__ = (
+        'user_id', 'state', 'last_activity', 'analysis_history',
+        'current_analysis', 'view_preferences', 'temp_data', 'rate_limits'
+    )
+
     def __init__(self, user_id: int):
         self.user_id = user_id
         self.state = UserState.MAIN_MENU
-        self.last_activity = time.time()
-        self.analysis_history: list = []
+        # Monotonic stamp: only ever diffed for expiry, never displayed
+        self.last_activity = time.monotonic()
+        # maxlen evicts the oldest entry in O(1); no manual pop(0) needed
+        self.analysis_history: Deque[Dict] = deque(maxlen=10)
         self.current_analysis: Optional[Dict] = None
         self.view_preferences = ViewPreferences()
         self.temp_data: Dict[str, Any] = {}
-        self.rate_limits: Dict[str, float] = {}
+        # One monotonic stamp per known action; list indexing replaces a
+        # per-session hash map for this small closed set
+        self.rate_limits: list = [0.0] * len(RateLimitAction)
+
+def format_history_timestamp(ts: float) -> str:
+    """ISO form of a history entry's float timestamp, for display"""
+    return datetime.fromtimestamp(ts).isoformat()
 
 class SessionManager:
     def __init__(self):
-        self.sessions: Dict[int, Session] = {}
+        # Kept in least-recently-used order: every touch moves the session
+        # to the end, so expired sessions accumulate at the front and
+        # cleanup stops at the first live one instead of scanning everything
+        self.sessions: OrderedDict[int, Session] = OrderedDict()
         self.cleanup_interval = 3600  # 1 hour
-        self.last_cleanup = time.time()
+        self.last_cleanup = time.monotonic()
+        # Cleanup is gated behind a power-of-two access counter so the hot
+        # path usually pays one clock read and a mask, not a time comparison
+        self._access_count = 0
+        self._cleanup_mask = 1023
         self.logger = logging.getLogger('TokenAnalyzer')
 
-    def get_session(self, user_id: int) -> Session:
-        """Get or create user session"""
-        self._check_cleanup()
-        
-        if user_id not in self.sessions:
-            self.sessions[user_id] = Session(user_id)
+    def _session(self, user_id: int, now: float) -> Session:
+        """Fetch-or-create with a caller-supplied clock reading.
+
+        Internal helper so methods that already hold a monotonic reading
+        (e.g. check_rate_limit) don't read the clock twice per call.
+        """
+        self._access_count += 1
+        if self._access_count & self._cleanup_mask == 0:
+            self._check_cleanup(now)
+
+        session = self.sessions.get(user_id)
+        if session is None:
+            session = self.sessions[user_id] = Session(user_id)
             self.logger.info(f"Created new session for user {user_id}")
         else:
-            self.sessions[user_id].last_activity = time.time()
-            
-        return self.sessions[user_id]
+            session.last_activity = now
+            self.sessions.move_to_end(user_id)
+
+        return session
+
+    def get_session(self, user_id: int) -> Session:
+        """Get or create user session"""
+        return self._session(user_id, time.monotonic())
 
     def update_state(self, user_id: int, new_state: UserState) -> None:
         """Update user state"""
         session = self.get_session(user_id)
         old_state = session.state
         session.state = new_state
-        session.last_activity = time.time()
         
         self.logger.debug(f"User {user_id} state changed: {old_state} -> {new_state}")
 
@@ -64,15 +104,22 @@ class SessionManager:
         """Get current user state"""
         return self.get_session(user_id).state
 
+    def peek_state(self, user_id: int) -> UserState:
+        """Read the user state without creating a session or touching activity.
+
+        Cheap pre-check for hot paths that ignore most messages; falls back
+        to MAIN_MENU for users with no session yet.
+        """
+        session = self.sessions.get(user_id)
+        return session.state if session else UserState.MAIN_MENU
+
     def add_to_history(self, user_id: int, analysis_data: Dict) -> None:
         """Add analysis to user history"""
         session = self.get_session(user_id)
-        analysis_data['timestamp'] = datetime.now().isoformat()
+        # Cheap float stamp; render with format_history_timestamp only when
+        # history is actually shown to the user
+        analysis_data['timestamp'] = time.time()
         session.analysis_history.append(analysis_data)
-        
-        # Keep only last 10 analyses
-        if len(session.analysis_history) > 10:
-            session.analysis_history.pop(0)
 
     def set_current_analysis(self, user_id: int, analysis_data: Dict) -> None:
         """Set current analysis data"""
@@ -88,36 +135,37 @@ class SessionManager:
         session = self.get_session(user_id)
         session.view_preferences = ViewPreferences(**preferences)
 
-    def check_rate_limit(self, user_id: int, action: str, cooldown: float) -> bool:
+    def check_rate_limit(self, user_id: int, action: RateLimitAction, cooldown: float) -> bool:
         """Check if action is rate limited"""
-        session = self.get_session(user_id)
-        current_time = time.time()
-        
-        if action in session.rate_limits:
-            if current_time - session.rate_limits[action] < cooldown:
-                return False
-                
+        current_time = time.monotonic()
+        session = self._session(user_id, current_time)
+
+        if current_time - session.rate_limits[action] < cooldown:
+            return False
+
         session.rate_limits[action] = current_time
         return True
 
-    def _check_cleanup(self) -> None:
+    def _check_cleanup(self, now: float) -> None:
         """Check if cleanup is needed"""
-        current_time = time.time()
-        if current_time - self.last_cleanup > self.cleanup_interval:
-            self._cleanup_old_sessions()
-            self.last_cleanup = current_time
-
-    def _cleanup_old_sessions(self) -> None:
-        """Clean up inactive sessions"""
-        current_time = time.time()
-        to_remove = []
-        
-        for user_id, session in self.sessions.items():
-            if current_time - session.last_activity > self.cleanup_interval:
-                to_remove.append(user_id)
-                
-        for user_id in to_remove:
-            del self.sessions[user_id]
+        if now - self.last_cleanup > self.cleanup_interval:
+            self._cleanup_old_sessions(now)
+            self.last_cleanup = now
+
+    def _cleanup_old_sessions(self, now: float = None) -> None:
+        """Drop expired sessions from the cold end of the LRU order.
+
+        The dict is kept in recency order, so this only touches sessions
+        that are actually expired and stops at the first live one —
+        O(expired), not O(all sessions).
+        """
+        cutoff = (now if now is not None else time.monotonic()) - self.cleanup_interval
+
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest.last_activity > cutoff:
+                break
+            user_id, _ = self.sessions.popitem(last=False)
             self.logger.info(f"Cleaned up inactive session for user {user_id}")
 
     def store_temp_data(self, user_id: int, key: str, value: Any) -> None:
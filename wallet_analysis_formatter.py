@@ -1,8 +1,41 @@
 # wallet_analysis_formatter.py
+from functools import lru_cache
 from typing import Dict, List
 import logging
 from datetime import datetime
 
+# Fields format_analysis_summary cannot work without
+_REQUIRED_FIELDS = frozenset(('risk_score', 'network_stats'))
+
+@lru_cache(maxsize=4096)
+def _short(addr: str) -> str:
+    """Truncated address display form; the same wallet recurs across many
+    patterns within one analysis, so the result is memoized"""
+    return f"{addr[:6]}...{addr[-4:]}"
+
+# Literal scaffolding hoisted to import time; each call only fills in the
+# five values instead of rebuilding the whole header string
+_SUMMARY_TMPL = (
+    "🔍 *Wallet Connection Analysis*\n\n"
+
+    "🎯 *Risk Assessment*\n"
+    "• Level: {level}\n"
+    "• Score: {score:.1f}/100\n\n"
+
+    "📊 *Network Overview*\n"
+    "• 👥 Connected Groups: {groups}\n"
+    "• 📊 Largest Group: {largest} wallets\n"
+    "• 🔄 Network Density: {density:.3f}\n\n"
+)
+
+_ALERT_TMPL = (
+    "⚠️ *Critical Risk Notification*\n\n"
+    "• Threat Level: {level}\n"
+    "• Evaluation: {score:.1f}/100\n"
+    "• Numerous concerning activities observed\n"
+    "• Comprehensive review advised\n"
+)
+
 class WalletAnalysisFormatter:
     def __init__(self):
         self.logger = logging.getLogger('TokenAnalyzer')
@@ -16,28 +49,23 @@ class WalletAnalysisFormatter:
             risk_score = analysis_data['risk_score']
             network_stats = analysis_data['network_stats']
 
-            summary = (
-                "🔍 *Wallet Connection Analysis*\n\n"
-                
-                "🎯 *Risk Assessment*\n"
-                f"• Level: {risk_score['risk_level']}\n"
-                f"• Score: {risk_score['score']:.1f}/100\n\n"
-                
-                "📊 *Network Overview*\n"
-                f"• 👥 Connected Groups: {network_stats['connected_groups']}\n"
-                f"• 📊 Largest Group: {network_stats['largest_group']} wallets\n"
-                f"• 🔄 Network Density: {network_stats['density']:.3f}\n\n"
-            )
+            parts = [_SUMMARY_TMPL.format(
+                level=risk_score['risk_level'],
+                score=risk_score['score'],
+                groups=network_stats['connected_groups'],
+                largest=network_stats['largest_group'],
+                density=network_stats['density']
+            )]
 
             # Add significant patterns if found
             patterns = self._format_significant_patterns(analysis_data)
             if patterns:
-                summary += patterns
+                parts.append(patterns)
 
             # Add risk insights
-            summary += self._format_risk_insights(risk_score)
+            parts.append(self._format_risk_insights(risk_score))
 
-            return summary
+            return "".join(parts)
 
         except Exception as e:
             self.logger.error(f"Error formatting analysis summary: {str(e)}")
@@ -45,82 +73,84 @@ class WalletAnalysisFormatter:
 
     def _format_significant_patterns(self, analysis_data: Dict) -> str:
         """Format the most significant patterns found"""
-        patterns_text = ""
-        
+        parts = []
+
         # Creation patterns (show top 3 most significant)
         if analysis_data.get('creation_patterns'):
-            patterns_text += "*⚠️ Suspicious Wallet Patterns*\n"
+            parts.append("*⚠️ Suspicious Wallet Patterns*\n")
             for pattern in analysis_data['creation_patterns'][:3]:
                 addr1, addr2 = pattern['wallets']
-                patterns_text += (
-                    f"• `{addr1[:6]}...{addr1[-4:]}` ↔️ `{addr2[:6]}...{addr2[-4:]}`\n"
+                parts.append(
+                    f"• `{_short(addr1)}` ↔️ `{_short(addr2)}`\n"
                     f"  Created {pattern['time_difference']:.1f}h apart\n"
                     f"  Combined: {pattern['combined_balance']:.1f}%\n"
                 )
-            
+
             total_patterns = analysis_data['total_patterns']['creation']
             if total_patterns > 3:
-                patterns_text += f"_...and {total_patterns - 3} more similar patterns_\n"
-            patterns_text += "\n"
-
-        # Recent transactions (show top 3 most significant)
-        recent_txs = [p for p in analysis_data.get('transaction_patterns', []) 
-                     if p.get('type') == 'recent_transaction' and p.get('value_eth', 0) > 0]
-        
-        if recent_txs:
-            patterns_text += "*💸 Recent Interactions (7d)*\n"
-            for tx in recent_txs[:3]:
+                parts.append(f"_...and {total_patterns - 3} more similar patterns_\n")
+            parts.append("\n")
+
+        # Recent transactions (show top 3 most significant). One pass keeps
+        # the three displayed entries and counts the rest, instead of
+        # materializing every matching pattern just to slice three
+        top_txs = []
+        tx_total = 0
+        for p in analysis_data.get('transaction_patterns', ()):
+            if p.get('type') == 'recent_transaction' and p.get('value_eth', 0) > 0:
+                tx_total += 1
+                if len(top_txs) < 3:
+                    top_txs.append(p)
+
+        if top_txs:
+            parts.append("*💸 Recent Interactions (7d)*\n")
+            for tx in top_txs:
                 addr1, addr2 = tx['wallets']
                 frequency = tx.get('frequency', 1)
                 value = tx.get('value_eth', 0)
-                patterns_text += (
-                    f"• `{addr1[:6]}...{addr1[-4:]}` ↔️ `{addr2[:6]}...{addr2[-4:]}`\n"
+                parts.append(
+                    f"• `{_short(addr1)}` ↔️ `{_short(addr2)}`\n"
                     f"  {frequency}x transfers, {value:.3f} ETH\n"
                 )
-            
-            if len(recent_txs) > 3:
-                patterns_text += f"_...and {len(recent_txs) - 3} more interactions_\n"
-            patterns_text += "\n"
 
-        return patterns_text
+            if tx_total > 3:
+                parts.append(f"_...and {tx_total - 3} more interactions_\n")
+            parts.append("\n")
+
+        return "".join(parts)
 
     def _format_risk_insights(self, risk_score: Dict) -> str:
         """Format risk insights based on risk score components"""
-        insights = "\n🚨 *Key Risk Insights*\n"
+        parts = ["\n🚨 *Key Risk Insights*\n"]
         components = risk_score.get('components', {})
-        
+
         # Add relevant insights based on component scores
         if components.get('cluster_score', 0) > 30:
-            insights += "🚨 Significant clustering of wallets identified\n"
-        
+            parts.append("🚨 Significant clustering of wallets identified\n")
+
         if components.get('density_score', 0) > 20:
-            insights += "🌐 Detected irregular relation with connection behaviors\n"
-        
+            parts.append("🌐 Detected irregular relation with connection behaviors\n")
+
         if components.get('variance_score', 0) > 20:
-            insights += "🧩 Questionable groupings of wallets observed\n"
-        
+            parts.append("🧩 Questionable groupings of wallets observed\n")
+
         if all(score <= 20 for score in components.values()):
-            insights += "🟢 No significant irregular patterns found\n"
+            parts.append("🟢 No significant irregular patterns found\n")
 
-        return insights
+        return "".join(parts)
 
     def _validate_data(self, data: Dict) -> bool:
         """Validate the analysis data structure"""
-        required_fields = ['risk_score', 'network_stats']
-        return all(field in data for field in required_fields)
+        return _REQUIRED_FIELDS.issubset(data)
 
     def get_quick_alert_message(self, analysis_data: Dict) -> str:
         """Generate a quick alert message for high-risk cases"""
-        if not analysis_data or not analysis_data.get('risk_score'):
+        # The common below-threshold case exits after a single lookup chain
+        risk_score = (analysis_data or {}).get('risk_score')
+        if not risk_score or risk_score.get('score', 0) < 70:
             return None
-            
-        risk_score = analysis_data['risk_score']
-        if risk_score['score'] >= 70:
-            return (
-                "⚠️ *Critical Risk Notification*\n\n"
-                f"• Threat Level: {risk_score['risk_level']}\n"
-                f"• Evaluation: {risk_score['score']:.1f}/100\n"
-                "• Numerous concerning activities observed\n"
-                "• Comprehensive review advised\n"
-            )
-        return None
\ No newline at end of file
+
+        return _ALERT_TMPL.format(
+            level=risk_score['risk_level'],
+            score=risk_score['score']
+        )
\ No newline at end of file
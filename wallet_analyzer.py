@@ -1,38 +1,152 @@
-from collections import defaultdict
-from typing import Dict, List
+import bisect
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import asyncio
+import aiohttp
 import logging
-import requests
+import random
 from datetime import datetime, timedelta
 import os
+import sys
 import time
 
+BASESCAN_URL = "https://api.basescan.org/api"
+# BaseScan tolerates ~10 concurrent calls on a keyed plan; the semaphore
+# below keeps request waves inside that budget
+_FETCH_CONCURRENCY = 10
+
 logger = logging.getLogger('TokenAnalyzer')
 
+# Risk-level ladder: index i labels scores in (threshold[i-1], threshold[i]]
+_RISK_LEVEL_THRESHOLDS = (20, 40, 60, 80)
+_RISK_LEVEL_LABELS = (
+    "✅ Negligible Threat",
+    "🟢 Minimal Risk",
+    "🟡 Moderate Concern",
+    "🟧 Elevated Threat",
+    "🛑 Extreme Danger"
+)
+
+@lru_cache(maxsize=1024)
+def _parse_tx_count(raw: str) -> int:
+    """Parse a tx-count display string ("150+", "42") to an int.
+
+    The same handful of raw strings recurs across holders within one
+    analysis, so the replace+int work is memoized.
+    """
+    return int(raw.replace('+', ''))
+
+def _clean_tx_count(tx_count) -> int:
+    """Clean transaction count string to integer; None/empty become 0
+    without touching the cache"""
+    if not tx_count:
+        return 0
+    if isinstance(tx_count, str):
+        return _parse_tx_count(tx_count)
+    return int(tx_count)
+
+class WalletTxCache:
+    """LRU cache for BaseScan responses with per-key TTLs.
+
+    A wallet's first transaction never changes, so first-tx entries live
+    forever; recent-history entries expire after a short TTL so repeated
+    analyses of overlapping holder sets within a burst reuse the download
+    without serving stale activity. Bounded by an OrderedDict that evicts
+    the coldest entry on overflow.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self._maxsize = maxsize
+        self._data: OrderedDict[str, tuple] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
 class WalletConnectionAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger('TokenAnalyzer')
         self.basescan_api_key = os.getenv('BASESCAN_API_KEY')
+        self._tx_cache = WalletTxCache()
         logger.info("WalletConnectionAnalyzer instance created")
 
     def analyze_wallet_connections(self, holders_data: List[Dict]) -> Dict:
+        """Sync entry point for callers running outside an event loop.
+
+        The analysis itself is async; existing call sites invoke this
+        from executor threads (no running loop), where asyncio.run can
+        drive it directly.
+        """
+        return asyncio.run(self.analyze_wallet_connections_async(holders_data))
+
+    async def analyze_wallet_connections_async(self, holders_data: List[Dict]) -> Dict:
         """Analyze connections between wallets in the top 50 holders"""
         try:
-            # Filter out contract addresses and developer
+            # Filter out contract addresses and developer. Addresses are
+            # lowercased and interned once here — shallow copies keep the
+            # callers' holder dicts (still used for display) untouched —
+            # so clusters, creation patterns and recent-tx patterns all
+            # emit the same joinable form and the per-transaction loops
+            # compare against already-normalized keys
             user_holders = [
-                holder for holder in holders_data 
+                {**holder, 'address': sys.intern(holder['address'].lower())}
+                for holder in holders_data
                 if holder['address_type'] not in ['Contract', 'Developer']
             ]
-            
+
+            # With fewer than two user wallets there are no pairs to
+            # compare — skip every fetch and pairwise pass outright
+            if len(user_holders) < 2:
+                return {
+                    'risk_score': self._get_default_risk_score(),
+                    'clusters': [],
+                    'creation_patterns': [],
+                    'transaction_patterns': []
+                }
+
+            # Parse each holder's nested fields once; the pairwise loops
+            # below work off these flat parallel lists
+            features = self._prepare_holder_features(user_holders)
+            similarity = self._similarity_matrix(features)
+
+            # One session spans both fetch phases, so connections opened
+            # for the timestamp wave are reused for the history wave
+            # instead of paying a fresh TCP+TLS handshake per phase
+            async with aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as session:
+                wallet_timestamps, recent_txlists = await asyncio.gather(
+                    self._fetch_first_tx_timestamps(session, user_holders),
+                    self._fetch_txlists(session, user_holders,
+                                        cache_prefix='recent_tx', ttl=30, sort='desc')
+                )
+
             # Initialize analysis components
-            creation_patterns = self._analyze_creation_patterns(user_holders)
-            transaction_patterns = self._analyze_transaction_patterns(user_holders)
-            recent_txs = self._analyze_recent_transactions(user_holders)
-            
+            creation_patterns = self._analyze_creation_patterns(user_holders, wallet_timestamps)
+            transaction_patterns = self._analyze_transaction_patterns(user_holders, features, similarity)
+            recent_txs = self._analyze_recent_transactions(user_holders, recent_txlists)
+
             if recent_txs:
                 transaction_patterns.extend(recent_txs)
-            
+
             # Find wallet clusters
-            clusters = self._find_clusters(user_holders)
+            clusters = self._find_clusters(user_holders, features, similarity)
             
             # Generate risk score
             risk_score = self._calculate_risk_score(clusters, len(user_holders))
@@ -49,270 +163,361 @@ class WalletConnectionAnalyzer:
             self.logger.error(f"Error analyzing wallet connections: {str(e)}")
             return {}
 
-    def _analyze_creation_patterns(self, holders: List[Dict]) -> List[Dict]:
-        """Analyze wallet creation time patterns"""
-        patterns = []
-        
-        # First get exact timestamps for each wallet using BaseScan API
-        wallet_timestamps = {}
+    async def _fetch_txlists(self, session: aiohttp.ClientSession, holders: List[Dict],
+                             cache_prefix: str = None, ttl: float = None,
+                             **query) -> Dict[str, List[Dict]]:
+        """Fetch BaseScan txlist results for every holder concurrently.
+
+        Shared by the creation-pattern fetch (offset=1, sort=asc) and the
+        recent-transaction fetch (sort=desc) — the caller's pooled
+        session, a semaphore to stay inside BaseScan's rate limit, and
+        exponential backoff on 429. Replaces the serial requests.get
+        loops whose wall time was ~one RTT per holder. Returns
+        {address: result list}; holders whose fetch failed are simply
+        absent. With a cache_prefix, cached results are served without
+        touching the network and fresh ones are stored under
+        "{cache_prefix}:{address}" with the given TTL.
+        """
+        results: Dict[str, List[Dict]] = {}
+        to_fetch = []
         for holder in holders:
+            cached = self._tx_cache.get(f"{cache_prefix}:{holder['address']}") \
+                if cache_prefix else None
+            if cached is not None:
+                results[holder['address']] = cached
+            else:
+                to_fetch.append(holder)
+        if not to_fetch:
+            return results
+
+        semaphore = asyncio.Semaphore(_FETCH_CONCURRENCY)
+
+        async def fetch(holder):
+            address = holder['address']
+            params = {
+                'module': 'account',
+                'action': 'txlist',
+                'address': address,
+                'startblock': '0',
+                'endblock': '99999999',
+                'apikey': self.basescan_api_key,
+                **query
+            }
             try:
-                url = "https://api.basescan.org/api"
-                params = {
-                    'module': 'account',
-                    'action': 'txlist',
-                    'address': holder['address'],
-                    'startblock': '0',
-                    'endblock': '99999999',
-                    'page': '1',
-                    'offset': '1',
-                    'sort': 'asc',
-                    'apikey': self.basescan_api_key
-                }
-                
-                response = requests.get(url, params=params)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data['status'] == '1' and data['result']:
-                        first_tx = data['result'][0]
-                        wallet_timestamps[holder['address']] = int(first_tx['timeStamp'])
-            
-                # Add small delay to avoid rate limiting
-                time.sleep(0.1)
-            
+                async with semaphore:
+                    data = await self._get_with_retry(session, BASESCAN_URL, params)
+                if data and data['status'] == '1' and data['result']:
+                    results[address] = data['result']
+                    if cache_prefix:
+                        self._tx_cache.set(f"{cache_prefix}:{address}", data['result'], ttl)
             except Exception as e:
-                self.logger.error(f"Error getting timestamp for {holder['address']}: {str(e)}")
-                continue
-        
-        # Now compare timestamps between wallets
-        for i, wallet1 in enumerate(holders):
-            addr1 = wallet1['address']
-            if addr1 not in wallet_timestamps:
-                continue
-                
-            for wallet2 in holders[i+1:]:
-                addr2 = wallet2['address']
-                if addr2 not in wallet_timestamps:
-                    continue
-                    
+                self.logger.error(f"Error fetching txlist for {address}: {str(e)}")
+
+        await asyncio.gather(*(fetch(holder) for holder in to_fetch))
+
+        return results
+
+    async def _get_with_retry(self, session: aiohttp.ClientSession, url: str,
+                              params: Dict, max_attempts: int = 5) -> Optional[Dict]:
+        """GET with exponential backoff on transient failures.
+
+        Rate-limit and gateway errors (429/5xx) and connection-level
+        aiohttp errors get retried with jittered exponential delays,
+        honoring a Retry-After header when the server sends one, so a
+        momentary BaseScan hiccup no longer silently drops a holder from
+        the analysis. Returns the decoded JSON body or None.
+        """
+        for attempt in range(max_attempts):
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    if response.status not in (429, 500, 502, 503, 504):
+                        return None
+                    retry_after = response.headers.get('Retry-After')
+            except aiohttp.ClientError:
+                if attempt == max_attempts - 1:
+                    raise
+                retry_after = None
+
+            if attempt == max_attempts - 1:
+                break
+            delay = min(2 ** attempt * 0.25 + random.random() * 0.1, 10)
+            if retry_after:
                 try:
-                    # Calculate time difference in minutes
-                    time_diff_minutes = abs(wallet_timestamps[addr1] - wallet_timestamps[addr2]) / 60
-                    
-                    # Only consider wallets created within 30 minutes of each other
-                    if time_diff_minutes <= 30:
-                        balance_sum = wallet1['balance_percentage'] + wallet2['balance_percentage']
-                        patterns.append({
-                            'type': 'creation',
-                            'wallets': [addr1, addr2],
-                            'time_difference': time_diff_minutes,
-                            'combined_balance': balance_sum,
-                            'timestamp1': wallet_timestamps[addr1],
-                            'timestamp2': wallet_timestamps[addr2]
-                        })
-                    
-                except Exception as e:
-                    self.logger.error(f"Error comparing timestamps: {str(e)}")
-                    continue
-        
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+
+        return None
+
+    async def _fetch_first_tx_timestamps(self, session: aiohttp.ClientSession,
+                                         holders: List[Dict]) -> Dict[str, int]:
+        """Fetch each wallet's first-transaction timestamp concurrently"""
+        txlists = await self._fetch_txlists(
+            session, holders, cache_prefix='first_tx', page='1', offset='1', sort='asc')
+        return {addr: int(txs[0]['timeStamp']) for addr, txs in txlists.items()}
+
+    def _analyze_creation_patterns(self, holders: List[Dict],
+                                   wallet_timestamps: Dict[str, int]) -> List[Dict]:
+        """Analyze wallet creation time patterns from prefetched timestamps.
+
+        Sorting by first-transaction time turns the all-pairs scan into a
+        sliding window: once a later wallet is more than 30 minutes away,
+        every wallet after it is too, so the inner loop breaks instead of
+        comparing the rest. The same pairs come out; only the order the
+        two addresses appear in each pattern follows creation time now.
+        """
+        entries = [
+            (wallet_timestamps[holder['address']], holder['address'], holder['balance_percentage'])
+            for holder in holders
+            if holder['address'] in wallet_timestamps and 'balance_percentage' in holder
+        ]
+        entries.sort()
+
+        patterns = []
+        for i, (ts1, addr1, bal1) in enumerate(entries):
+            # Only consider wallets created within 30 minutes of each other
+            cutoff = ts1 + 30 * 60
+            for j in range(i + 1, len(entries)):
+                ts2, addr2, bal2 = entries[j]
+                if ts2 > cutoff:
+                    break
+                patterns.append({
+                    'type': 'creation',
+                    'wallets': [addr1, addr2],
+                    'time_difference': (ts2 - ts1) / 60,
+                    'combined_balance': bal1 + bal2,
+                    'timestamp1': ts1,
+                    'timestamp2': ts2
+                })
+
         # Sort by time difference first, then by combined balance
         return sorted(patterns, key=lambda x: (x['time_difference'], -x['combined_balance']))
 
-    def _analyze_transaction_patterns(self, holders: List[Dict]) -> List[Dict]:
+    def _prepare_holder_features(self, holders: List[Dict]) -> Dict[str, list]:
+        """Flatten the per-holder fields the pairwise loops need.
+
+        The double loops below visit every pair, so nested dict walks and
+        tx-count string parsing done per pair cost O(N²); doing them once
+        per holder here leaves the pair loops with plain list indexing.
+        Missing fields become None so callers keep the original skip
+        semantics.
+        """
+        features = {
+            'base_tx': [], 'eth_tx': [], 'active': [], 'valid': [],
+            'recent': [], 'age': [], 'bal': []
+        }
+        for holder in holders:
+            info = holder.get('activity_info') or {}
+            try:
+                features['base_tx'].append(_clean_tx_count(info['base_chain']['total_tx_count']))
+                features['eth_tx'].append(_clean_tx_count(info['ethereum']['total_tx_count']))
+                features['active'].append(bool(info['is_active_overall']))
+                features['valid'].append(True)
+            except (KeyError, ValueError):
+                features['base_tx'].append(0)
+                features['eth_tx'].append(0)
+                features['active'].append(False)
+                features['valid'].append(False)
+            features['recent'].append(info.get('total_recent_tx_count'))
+            features['age'].append((holder.get('age_info') or {}).get('wallet_age_days'))
+            features['bal'].append(holder.get('balance_percentage'))
+        return features
+
+    def _similarity_matrix(self, features: Dict[str, list]) -> List[List[float]]:
+        """Pairwise transaction-pattern similarity for every holder pair.
+
+        Computed once and shared by _analyze_transaction_patterns and
+        _find_clusters, which previously each re-derived the same pair
+        values. Rows for holders without activity data stay all-zero.
+        """
+        valid = features['valid']
+        base_tx = features['base_tx']
+        eth_tx = features['eth_tx']
+        active = features['active']
+        n = len(valid)
+        sim = [[0.0] * n for _ in range(n)]
+
+        for i in range(n):
+            if not valid[i]:
+                continue
+            base1, eth1, active1, row = base_tx[i], eth_tx[i], active[i], sim[i]
+            for j in range(i + 1, n):
+                if not valid[j]:
+                    continue
+                base2, eth2 = base_tx[j], eth_tx[j]
+
+                base_ratio = min(base1, base2) / max(base1, base2) if base1 or base2 else 0
+                eth_ratio = min(eth1, eth2) / max(eth1, eth2) if eth1 or eth2 else 0
+
+                # Weight Base activity more heavily
+                similarity = (base_ratio * 0.7) + (eth_ratio * 0.3)
+                similarity *= 1.2 if active1 and active[j] else 0.8
+                row[j] = sim[j][i] = similarity
+
+        return sim
+
+    def _analyze_transaction_patterns(self, holders: List[Dict], features: Dict[str, list],
+                                      similarity: List[List[float]]) -> List[Dict]:
         """Analyze transaction patterns between user wallets only"""
         patterns = []
-        for i, wallet1 in enumerate(holders):
-            for wallet2 in holders[i+1:]:
-                try:
-                    # Skip if either wallet has no transaction data
-                    if not all(key in wallet1['activity_info'] for key in ['base_chain', 'ethereum']) or \
-                       not all(key in wallet2['activity_info'] for key in ['base_chain', 'ethereum']):
-                        continue
-                    
-                    # Compare transaction patterns
-                    similarity = self._calculate_tx_similarity(wallet1, wallet2)
-                    if similarity > 0.8:  # High similarity threshold
-                        balance_sum = wallet1['balance_percentage'] + wallet2['balance_percentage']
-                        patterns.append({
-                            'type': 'transaction',
-                            'wallets': [wallet1['address'], wallet2['address']],
-                            'similarity': similarity,
-                            'combined_balance': balance_sum,
-                            'recent_activity': bool(wallet1['activity_info']['total_recent_tx_count'] or 
-                                                  wallet2['activity_info']['total_recent_tx_count'])
-                        })
-                except KeyError:
+        for i in range(len(holders)):
+            if not features['valid'][i]:
+                continue
+            for j in range(i + 1, len(holders)):
+                if not features['valid'][j]:
+                    continue
+                if features['recent'][i] is None or features['recent'][j] is None:
                     continue
-        
-        return sorted(patterns, 
-                     key=lambda x: (x['similarity'], x['combined_balance']), 
+                if features['bal'][i] is None or features['bal'][j] is None:
+                    continue
+
+                # Compare transaction patterns
+                if similarity[i][j] > 0.8:  # High similarity threshold
+                    patterns.append({
+                        'type': 'transaction',
+                        'wallets': [holders[i]['address'], holders[j]['address']],
+                        'similarity': similarity[i][j],
+                        'combined_balance': features['bal'][i] + features['bal'][j],
+                        'recent_activity': bool(features['recent'][i] or features['recent'][j])
+                    })
+
+        return sorted(patterns,
+                     key=lambda x: (x['similarity'], x['combined_balance']),
                      reverse=True)
 
-    def _analyze_recent_transactions(self, holders: List[Dict]) -> List[Dict]:
-        """Analyze direct transactions between holder wallets in the past 7 days"""
-        patterns = []
-        holder_addresses = {h['address'].lower() for h in holders}
+    def _analyze_recent_transactions(self, holders: List[Dict],
+                                     txlists: Dict[str, List[Dict]]) -> List[Dict]:
+        """Analyze direct transactions between holder wallets in the past 7 days.
+
+        Works on prefetched transaction histories; this loop only filters
+        the downloaded lists.
+        """
+        holder_addresses = {h['address'] for h in holders}
         seven_days_ago = int((datetime.now() - timedelta(days=7)).timestamp())
-        
+
+        # pair -> [total wei, frequency, latest timestamp]; running
+        # aggregates accumulate as transactions are filtered, replacing
+        # the old per-pair lists that were re-walked in a second pass
+        pair_stats: Dict[tuple, list] = {}
+
         try:
-            for holder in holders:
-                address = holder['address']
-                url = "https://api.basescan.org/api"
-                params = {
-                    'module': 'account',
-                    'action': 'txlist',
-                    'address': address,
-                    'startblock': '0',
-                    'endblock': '99999999',
-                    'sort': 'desc',
-                    'apikey': self.basescan_api_key
-                }
-                
-                try:
-                    response = requests.get(url, params=params)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data['status'] == '1' and data['result']:
-                            recent_txs = [
-                                tx for tx in data['result']
-                                if int(tx['timeStamp']) >= seven_days_ago and
-                                tx['to'].lower() in holder_addresses and
-                                not self._is_contract_transaction(tx)
-                            ]
-                            
-                            for tx in recent_txs:
-                                from_addr = tx['from'].lower()
-                                to_addr = tx['to'].lower()
-                                value_eth = float(tx['value']) / 1e18
-                                
-                                if value_eth > 0:  # Only consider non-zero value transactions
-                                    patterns.append({
-                                        'type': 'recent_transaction',
-                                        'wallets': [from_addr, to_addr],
-                                        'value_eth': value_eth,
-                                        'timestamp': int(tx['timeStamp']),
-                                        'tx_hash': tx['hash']
-                                    })
-                except Exception as e:
-                    self.logger.error(f"Error getting transactions for {address}: {str(e)}")
-                    continue
-        
+            for address, txs in txlists.items():
+                # Histories arrive newest-first (sort=desc): the first
+                # transaction older than the window means every remaining
+                # one is too, so the scan stops there instead of walking
+                # a long-lived wallet's full history
+                for tx in txs:
+                    timestamp = int(tx['timeStamp'])
+                    if timestamp < seven_days_ago:
+                        break
+                    to_addr = tx['to'].lower()
+                    if to_addr not in holder_addresses:
+                        continue
+                    if self._is_contract_transaction(tx):
+                        continue
+                    value_wei = int(tx['value'])
+                    if value_wei <= 0:  # Only consider non-zero value transactions
+                        continue
+
+                    from_addr = tx['from'].lower()
+                    pair = (from_addr, to_addr) if from_addr <= to_addr else (to_addr, from_addr)
+
+                    stats = pair_stats.get(pair)
+                    if stats is None:
+                        pair_stats[pair] = [value_wei, 1, timestamp]
+                    else:
+                        stats[0] += value_wei
+                        stats[1] += 1
+                        if timestamp > stats[2]:
+                            stats[2] = timestamp
+
         except Exception as e:
             self.logger.error(f"Error in recent transaction analysis: {str(e)}")
-        
-        # Group transactions by wallet pairs
-        tx_pairs = defaultdict(list)
-        for pattern in patterns:
-            pair = tuple(sorted(pattern['wallets']))
-            tx_pairs[pair].append(pattern)
-        
-        # Aggregate transactions between same pairs
-        aggregated_patterns = []
-        for pair, txs in tx_pairs.items():
-            total_value = sum(tx['value_eth'] for tx in txs)
-            aggregated_patterns.append({
+
+        # Wei totals stay exact integers through aggregation; the lossy
+        # float division happens once per pair at output time
+        aggregated_patterns = [
+            {
                 'type': 'recent_transaction',
                 'wallets': list(pair),
-                'value_eth': total_value,
-                'frequency': len(txs),
-                'latest_timestamp': max(tx['timestamp'] for tx in txs)
-            })
-        
-        return sorted(aggregated_patterns, 
-                     key=lambda x: (x['frequency'], x['value_eth']), 
+                'value_eth': total_wei / 1e18,
+                'frequency': frequency,
+                'latest_timestamp': latest
+            }
+            for pair, (total_wei, frequency, latest) in pair_stats.items()
+        ]
+
+        return sorted(aggregated_patterns,
+                     key=lambda x: (x['frequency'], x['value_eth']),
                      reverse=True)
 
     def _is_contract_transaction(self, tx: Dict) -> bool:
         """Check if transaction involves contract interaction"""
         return tx.get('input', '0x') != '0x'  # Non-zero input data indicates contract interaction
 
-    def _calculate_tx_similarity(self, wallet1: Dict, wallet2: Dict) -> float:
-        """Calculate transaction pattern similarity between two wallets"""
-        try:
-            # Compare Base chain activity
-            base_tx1 = self._clean_tx_count(wallet1['activity_info']['base_chain']['total_tx_count'])
-            base_tx2 = self._clean_tx_count(wallet2['activity_info']['base_chain']['total_tx_count'])
-            
-            # Compare Ethereum activity
-            eth_tx1 = self._clean_tx_count(wallet1['activity_info']['ethereum']['total_tx_count'])
-            eth_tx2 = self._clean_tx_count(wallet2['activity_info']['ethereum']['total_tx_count'])
-            
-            # Calculate ratios
-            base_ratio = min(base_tx1, base_tx2) / max(base_tx1, base_tx2) if max(base_tx1, base_tx2) > 0 else 0
-            eth_ratio = min(eth_tx1, eth_tx2) / max(eth_tx1, eth_tx2) if max(eth_tx1, eth_tx2) > 0 else 0
-            
-            # Weight Base activity more heavily
-            similarity = (base_ratio * 0.7) + (eth_ratio * 0.3)
-            
-            # Consider activity timing
-            both_active = (wallet1['activity_info']['is_active_overall'] and 
-                         wallet2['activity_info']['is_active_overall'])
-            
-            return similarity * (1.2 if both_active else 0.8)
-            
-        except (KeyError, ValueError, ZeroDivisionError):
-            return 0.0
-
-    def _clean_tx_count(self, tx_count: str) -> int:
-        """Clean transaction count string to integer"""
-        if isinstance(tx_count, str):
-            return int(tx_count.replace('+', ''))
-        return int(tx_count) if tx_count else 0
-
-    def _find_clusters(self, holders: List[Dict]) -> List[List[str]]:
-        """Find clusters of connected wallets with stricter criteria"""
-        clusters = []
-        used_wallets = set()
-        
-        for i, wallet1 in enumerate(holders):
-            if wallet1['address'] in used_wallets:
-                continue
-                
-            current_cluster = [wallet1['address']]
-            used_wallets.add(wallet1['address'])
-            
-            for wallet2 in holders[i+1:]:
-                if wallet2['address'] in used_wallets:
-                    continue
-                    
-                connection_weight = self._calculate_connection_weight(wallet1, wallet2)
-                
-                if connection_weight >= 0.8:  # Higher threshold for connection
-                    current_cluster.append(wallet2['address'])
-                    used_wallets.add(wallet2['address'])
-            
-            if len(current_cluster) > 1:
-                clusters.append(current_cluster)
-        
+    def _find_clusters(self, holders: List[Dict], features: Dict[str, list],
+                       similarity: List[List[float]]) -> List[List[str]]:
+        """Find clusters of connected wallets with stricter criteria.
+
+        Union-find over the >= 0.8 connection-weight graph. Unlike the
+        old greedy first-seed sweep this merges transitive chains — A~B
+        and B~C land in one cluster even when A and C don't connect
+        directly — and every pair's weight is evaluated exactly once.
+        """
+        n = len(holders)
+        parent = list(range(n))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]  # path halving
+                x = parent[x]
+            return x
+
+        for i in range(n):
+            for j in range(i + 1, n):
+                if self._connection_weight_from_features(i, j, features, similarity) >= 0.8:
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j:
+                        parent[root_j] = root_i
+
+        groups = defaultdict(list)
+        for i in range(n):
+            groups[find(i)].append(holders[i]['address'])
+
+        clusters = [group for group in groups.values() if len(group) > 1]
         return sorted(clusters, key=len, reverse=True)
 
-    def _calculate_connection_weight(self, wallet1: Dict, wallet2: Dict) -> float:
-        """Calculate connection weight between two wallets"""
+    def _connection_weight_from_features(self, i: int, j: int, features: Dict[str, list],
+                                         similarity: List[List[float]]) -> float:
+        """Connection weight between holder pair (i, j)"""
         weight = 0.0
-        
-        try:
-            # Creation time similarity (40%)
-            time_diff = abs(wallet1['age_info']['wallet_age_days'] - 
-                          wallet2['age_info']['wallet_age_days'])
-            if time_diff < 1:
-                weight += 0.4
-            elif time_diff < 7:
-                weight += 0.2
-            
-            # Transaction pattern similarity (40%)
-            similarity = self._calculate_tx_similarity(wallet1, wallet2)
-            weight += similarity * 0.4
-            
-            # Balance pattern similarity (20%)
-            balance_diff = abs(wallet1['balance_percentage'] - wallet2['balance_percentage'])
+
+        # Creation time similarity (40%); without age data no other
+        # component counts, matching the original early-KeyError behavior
+        age1, age2 = features['age'][i], features['age'][j]
+        if age1 is None or age2 is None:
+            return weight
+        time_diff = abs(age1 - age2)
+        if time_diff < 1:
+            weight += 0.4
+        elif time_diff < 7:
+            weight += 0.2
+
+        # Transaction pattern similarity (40%)
+        weight += similarity[i][j] * 0.4
+
+        # Balance pattern similarity (20%)
+        bal1, bal2 = features['bal'][i], features['bal'][j]
+        if bal1 is not None and bal2 is not None:
+            balance_diff = abs(bal1 - bal2)
             if balance_diff < 1:
                 weight += 0.2
             elif balance_diff < 5:
                 weight += 0.1
-                
-        except (KeyError, ValueError):
-            pass
-            
+
         return weight
 
     def _calculate_risk_score(self, clusters: List[List[str]], total_holders: int) -> Dict:
@@ -321,19 +526,22 @@ class WalletConnectionAnalyzer:
             if total_holders == 0:
                 return self._get_default_risk_score()
 
+            # Materialize cluster sizes once; every statistic below
+            # derives from this list instead of re-walking the clusters
+            cluster_sizes = [len(cluster) for cluster in clusters]
+
             # Analyze cluster characteristics
-            largest_cluster = max(len(cluster) for cluster in clusters) if clusters else 0
+            largest_cluster = max(cluster_sizes) if cluster_sizes else 0
             cluster_ratio = largest_cluster / total_holders
-            
+
             # Calculate network density
-            total_connections = sum(len(cluster) * (len(cluster) - 1) / 2 for cluster in clusters)
+            total_connections = sum(size * (size - 1) / 2 for size in cluster_sizes)
             max_possible_connections = total_holders * (total_holders - 1) / 2
             density = total_connections / max_possible_connections if max_possible_connections > 0 else 0
-            
-            # Calculate cluster distribution score
-            cluster_sizes = [len(cluster) for cluster in clusters]
-            avg_cluster_size = sum(cluster_sizes) / len(clusters) if clusters else 0
-            size_variance = sum((size - avg_cluster_size) ** 2 for size in cluster_sizes) / len(clusters) if clusters else 0
+
+            # Calculate cluster distribution score (population variance)
+            avg_cluster_size = sum(cluster_sizes) / len(cluster_sizes) if cluster_sizes else 0
+            size_variance = sum((size - avg_cluster_size) ** 2 for size in cluster_sizes) / len(cluster_sizes) if cluster_sizes else 0
             
             # Calculate risk score components
             cluster_score = min(cluster_ratio * 40, 40)  # Max 40 points
@@ -376,13 +584,4 @@ class WalletConnectionAnalyzer:
 
     def _get_risk_level(self, score: float) -> str:
         """Convert risk score to risk level with emojis"""
-        if score >= 80:
-            return "🛑 Extreme Danger"
-        elif score >= 60:
-            return "🟧 Elevated Threat"
-        elif score >= 40:
-            return "🟡 Moderate Concern"
-        elif score >= 20:
-            return "🟢 Minimal Risk"
-        else:
-            return "✅ Negligible Threat"
\ No newline at end of file
+        return _RISK_LEVEL_LABELS[bisect.bisect_right(_RISK_LEVEL_THRESHOLDS, score)]
\ No newline at end of file